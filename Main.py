@@ -8,9 +8,30 @@ if __name__ == "__main__":
     parser.add_argument("--plot3Dpos", action='store_true', help="plot static 3d position plot")
     parser.add_argument("--anim", action='store_true', help="make animation that shows sim progression on the X-Y, Y-Z, and X-Z planes")
     parser.add_argument("--rfc", action='store_true', help="run random forest with classification trees")
+    parser.add_argument("--lrc", action='store_true', help="run multinomial logistic regression classifier")
+    parser.add_argument("--hgb", action='store_true', help="run histogram gradient boosting classifier")
 
     # arguments-sim
     parser.add_argument("--earlyStop", action="store_true", help="stop sim early if either collision or ejection")
+    parser.add_argument("--instrument", action="store_true", help="accumulate wall time and call counts for each phase of the sim; written as per-scenario columns and a run summary in data/Simulation_timing.csv")
+    parser.add_argument("--telemetry", default='bar', choices=['bar', 'json', 'off'], help="progress reports: a single human readable line (bar), JSON lines for headless runs (json), or nothing (off). default = bar")
+    parser.add_argument("--telemetryInterval", default=1.0, type=float, help="minimum seconds between progress reports (default = 1.0)")
+    parser.add_argument("--active", type=int, metavar="NROUNDS", help="adaptive campaign: after the DOE, run NROUNDS batches of scenarios chosen where a surrogate fit on the finished runs is least certain of the outcome")
+    parser.add_argument("--batchSize", default=32, type=int, help="scenarios per active learning round (default = 32)")
+    parser.add_argument("--triage", action="store_true", help="predict-then-verify: score pending scenarios with a surrogate fit on earlier results, simulate the uncertain ones first, and only spot check the confident ones; skipped rows are marked 'predicted' in the source column")
+    parser.add_argument("--confidence", default=0.99, type=float, help="triage: predicted probability at which a scenario counts as confident (default = 0.99)")
+    parser.add_argument("--auditRate", default=0.05, type=float, help="triage: fraction of confident scenarios simulated anyway as a spot check (default = 0.05)")
+    parser.add_argument("--multiFidelity", action="store_true", help="two stage campaign: run every scenario with a coarse time step first, then re-run only the ambiguous ones (near the ejection or collision criteria, or with high energy drift) at full resolution; both are kept with a fidelity column")
+    parser.add_argument("--coarseScale", default=8, type=float, help="multi-fidelity: time step scale factor of the coarse pass (default = 8)")
+    parser.add_argument("--sequential", action="store_true", help="sequential Monte Carlo: run a few replicates of every treatment, then keep adding replicates only to treatments whose survival probability interval is still wider than --halfWidth; unneeded replicates are spent on the uncertain treatments")
+    parser.add_argument("--halfWidth", default=0.15, type=float, help="sequential Monte Carlo: target half width of the 95%% interval on P(survive) (default = 0.15)")
+    parser.add_argument("--megno", action="store_true", help="integrate the variational equations alongside each scenario for the MEGNO chaos indicator (saved in a megno column)")
+    parser.add_argument("--megnoStop", action="store_true", help="with the MEGNO indicator, classify a run whose MEGNO has stayed settled below --megnoThreshold for 3 windows of one orbital period each as a regular survivor and stop it early (check against full-length runs with development/checkMegnoStop.py first)")
+    parser.add_argument("--megnoThreshold", default=2.2, type=float, help="MEGNO value below which a settled run counts as regular (default = 2.2; regular orbits tend to 2)")
+    parser.add_argument("--memoize", action="store_true", help="keep every scenario result in data/cache/scenarios, keyed by a hash of its initial conditions and run settings; scenarios seen before are looked up instead of integrated")
+    parser.add_argument("--rngSeed", type=int, help="draw each scenario's random factors from its own stream seeded by (rngSeed, treatmentN, monteCarloN), so re-runs reproduce them (and hit the --memoize cache)")
+    parser.add_argument("--maxSteps", type=int, help="step budget per scenario; runs that hit it before an outcome are marked truncated")
+    parser.add_argument("--maxWallTime", type=float, help="wall clock budget (s) per scenario; runs that hit it before an outcome are marked truncated")
     parser.add_argument("--ejectSF", default=1.0, type=float, help="scale factor to increase or decrease ejection critera. EG: --ejectSF 0.5 means scenario will be classified as ejection if speed >= 0.5*escape speed; --ejectSF 2.0 means scenario will be classified as ejection if speed >= 2*escape speed")
 
     # exploratory data analysis
@@ -23,6 +44,27 @@ if __name__ == "__main__":
     # arguments-animation
 
     # arguments-random forest classifier
+    parser.add_argument("--search", default='grid', choices=['grid', 'halving', 'hyperband'], help="hyper-parameter search strategy: every combination (grid), successive halving (halving), or hyperband. default = grid")
+    parser.add_argument("--eta", default=3, type=int, help="halving/hyperband: keep the top 1/eta of configurations at each rung (default = 3)")
+    parser.add_argument("--minBudget", default=1/27, type=float, help="halving/hyperband: smallest fraction of the training set a configuration is fit on (default = 1/27)")
+    parser.add_argument("--cv", type=int, help="cross validate each surrogate model configuration over this many stratified folds of the train and validate rows (default = fixed split)")
+    parser.add_argument("--repeats", default=1, type=int, help="number of times the cross validation folds are reshuffled (default = 1)")
+    parser.add_argument("--nJobs", default=1, type=int, help="number of worker processes for the sim (scenarios run longest-expected-first) and the surrogate model hyper-parameter search (default = 1)")
+
+    # arguments-surrogate predictions
+    parser.add_argument("--predictGrid", type=int, metavar="NPOINTS", help="predict outcome probabilities with the trained random forest over a dense grid of NPOINTS values per factor; streamed to data/RandomForestClassifier_grid.npy")
+    parser.add_argument("--predictStream", type=int, metavar="NSAMPLES", help="predict outcome probabilities with the trained random forest for NSAMPLES random points of the factor space; streamed to data/RandomForestClassifier_stream.npy")
+    parser.add_argument("--chunkSize", default=2**16, type=int, help="points per prediction chunk (default = 65536)")
+
+    # arguments-prediction server
+    parser.add_argument("--serve", action='store_true', help="serve the trained random forest on localhost: POST /predict, GET /stats, GET /health")
+    parser.add_argument("--port", default=8765, type=int, help="localhost port for --serve (default = 8765)")
+    parser.add_argument("--socket", help="serve on this Unix socket path instead of the port")
+
+    # arguments-profiling
+    parser.add_argument("--profile", nargs='?', const='cprofile', choices=['cprofile', 'sample'], help="profile each selected stage with a deterministic (cprofile, default) or sampling (sample) profiler plus tracemalloc; reports are saved in a time stamped run directory")
+    parser.add_argument("--profileTop", default=30, type=int, help="number of rows in the hot function and allocation tables (default = 30)")
+    parser.add_argument("--profileDir", default="profiles", help="directory the profiling run directories are made in (default = profiles)")
 
     # process args
     args = parser.parse_args()
@@ -34,39 +76,105 @@ if __name__ == "__main__":
     plot3Dpos = kwargs.pop('plot3Dpos')
     anim = kwargs.pop('anim')
     rfc = kwargs.pop('rfc')
+    lrc = kwargs.pop('lrc')
+    hgb = kwargs.pop('hgb')
+    predictGrid = kwargs.pop('predictGrid')
+    predictStream = kwargs.pop('predictStream')
+    serve = kwargs.pop('serve')
+    active = kwargs.pop('active')
+    batchSize = kwargs.pop('batchSize')
+    multiFidelity = kwargs.pop('multiFidelity')
+    coarseScale = kwargs.pop('coarseScale')
+    sequential = kwargs.pop('sequential')
+    halfWidth = kwargs.pop('halfWidth')
+    profile = kwargs.pop('profile')
+    profileTop = kwargs.pop('profileTop')
+    profileDir = kwargs.pop('profileDir')
 
     # make a lists for each set of model arguments
-    simKwargKeys = ['earlyStop', 'ejectSF']
+    simKwargKeys = ['earlyStop', 'ejectSF', 'instrument', 'telemetry', 'telemetryInterval', 'triage', 'confidence', 'auditRate', 'megno', 'megnoStop', 'megnoThreshold', 'memoize', 'rngSeed', 'nJobs', 'maxSteps', 'maxWallTime']
     edaKeys = []
     posPlotKeys = ['sampleRowIdx', 'timeIdx']
     animKeys = ['sampleRowIdx']
-    rfcKwargKeys = []
+    rfcKwargKeys = ['nJobs', 'search', 'eta', 'minBudget', 'cv', 'repeats']
+    predictKeys = ['nJobs', 'chunkSize', 'telemetry', 'telemetryInterval']
+    serveKeys = ['port', 'socket']
 
     # separate dictionaries
-    [simKwargs, edaKwargs, posPlotKwargs, animKwargs, rfcKwargs] = map(lambda keys: {x: kwargs[x] for x in keys}, [simKwargKeys, edaKeys, posPlotKeys, animKeys, rfcKwargKeys])
+    [simKwargs, edaKwargs, posPlotKwargs, animKwargs, rfcKwargs, predictKwargs, serveKwargs] = map(lambda keys: {x: kwargs[x] for x in keys}, [simKwargKeys, edaKeys, posPlotKeys, animKeys, rfcKwargKeys, predictKeys, serveKeys])
+
+    # wrap each stage in a profiler if asked to, otherwise run as is
+    if profile:
+        import time
+        from pyFiles.Instrumentation import profileStage
+        runDir = f"{profileDir}/{time.strftime('%Y%m%d-%H%M%S')}"
+        stage = lambda name: profileStage(name, runDir, profiler=profile, top=profileTop, verbose=True)
+    else:
+        from contextlib import nullcontext
+        stage = lambda name: nullcontext()
 
     # run simulation
     if sim:
-        from pyFiles.Simulation import Simulation
-        simInst = Simulation()
-        simInst.run(**simKwargs)
+        with stage('sim'):
+            from pyFiles.Simulation import Simulation
+            simInst = Simulation()
+            if active:
+                simInst.runActive(active, batchSize, **simKwargs)
+            elif multiFidelity:
+                simInst.runMultiFidelity(coarseScale=coarseScale, **simKwargs)
+            elif sequential:
+                simInst.runSequential(halfWidth=halfWidth, **simKwargs)
+            else:
+                simInst.run(**simKwargs)
 
     # exploratory analysis
     if eda:
-        import pyFiles.explore_data
+        with stage('eda'):
+            import pyFiles.explore_data
 
     # plot static 3d positions
     if plot3Dpos:
-        from pyFiles.Plots import staticPositionPlot
-        staticPositionPlot(**posPlotKwargs)
+        with stage('plot3Dpos'):
+            from pyFiles.Plots import staticPositionPlot
+            staticPositionPlot(**posPlotKwargs)
 
     # make animation .mp4 file
     if anim:
-        from pyFiles.Plots import scenarioAnimation
-        scenarioAnimation(**animKwargs)
+        with stage('anim'):
+            from pyFiles.Plots import scenarioAnimation
+            scenarioAnimation(**animKwargs)
 
     # run random forest classifier
     if rfc:
+        with stage('rfc'):
+            from pyFiles.MetaModels.RFclassification import RandomForests
+            rfcInst = RandomForests()
+            rfcInst.run(**rfcKwargs)
+
+    # run logistic regression classifier
+    if lrc:
+        with stage('lrc'):
+            from pyFiles.MetaModels.LogisticRegression import LogisticRegression
+            lrcInst = LogisticRegression()
+            lrcInst.run(**rfcKwargs)
+
+    # run histogram gradient boosting classifier
+    if hgb:
+        with stage('hgb'):
+            from pyFiles.MetaModels.HGBclassification import GradientBoosting
+            hgbInst = GradientBoosting()
+            hgbInst.run(**rfcKwargs)
+
+    # predict over the factor space with the trained random forest
+    if predictGrid or predictStream:
+        with stage('predict'):
+            from pyFiles.MetaModels.RFclassification import RandomForests
+            rfcInst = RandomForests()
+            if predictGrid: rfcInst.predictGrid(nPoints=predictGrid, **predictKwargs)
+            if predictStream: rfcInst.predictStream(predictStream, **predictKwargs)
+
+    # serve the trained random forest until interrupted
+    if serve:
         from pyFiles.MetaModels.RFclassification import RandomForests
-        rfcInst = RandomForests()
-        rfcInst.run(**rfcKwargs)
+        from pyFiles.MetaModels.PredictionServer import serveModel
+        serveModel(RandomForests(), verbose=True, **serveKwargs)
@@ -0,0 +1,71 @@
+"""
+per-call cost check of the numerical kernels that used to touch the global
+warnings filters ( escapeSpeed, xyz2spc, timeStep ). each kernel is called
+nCalls times ( default 10**6 ), every 10th call on degenerate input ( two
+stars on top of each other, a star at rest ) so the masked branches run too.
+the calls are timed in 10 blocks. the check fails if warnings.filters has
+grown after any block ( deterministic, this is what used to slow the kernels
+down ), or if the median block of the second half costs more than 3x the
+median block of the first half ( a growing filter list slows the calls down
+by far more than that; the median keeps machine noise out ). any numpy
+RuntimeWarning is raised as an error.
+
+run from the repository root:
+    python development/checkKernelCost.py [nCalls]
+"""
+
+import os
+import sys
+from time import perf_counter
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+import pyFiles.Functions as fun
+
+nCalls = int(sys.argv[1]) if len(sys.argv) > 1 else 10**6
+nBlocks = 10
+maxGrowth = 3
+
+rng = np.random.RandomState(0)
+x_i3 = rng.normal(size=(3,3))
+xdot_i3 = rng.normal(size=(3,3))
+m_i1 = rng.uniform(0.5, 2, size=(3,1))
+# degenerate input: stars 0 and 1 coincide, star 2 is at rest
+xBad_i3 = x_i3.copy()
+xBad_i3[1] = xBad_i3[0]
+xdotBad_i3 = xdot_i3.copy()
+xdotBad_i3[2] = 0
+
+kernels = {
+    'escapeSpeed'   : (lambda: fun.escapeSpeed(x_i3, m_i1), lambda: fun.escapeSpeed(xBad_i3, m_i1)),
+    'xyz2spc'       : (lambda: fun.xyz2spc(x_i3), lambda: fun.xyz2spc(np.zeros((3,3)))),
+    'timeStep'      : (lambda: fun.timeStep(x_i3, xdot_i3), lambda: fun.timeStep(x_i3, xdotBad_i3)),
+}
+
+if __name__ == "__main__":
+    # a numpy warning from the degenerate calls would mean a branch isn't
+    # masked
+    warnings.simplefilter('error', RuntimeWarning)
+    nFilters = len(warnings.filters)
+    failed = False
+    for name, (call, degenerate) in kernels.items():
+        blockSize = nCalls // nBlocks
+        blockCost = np.zeros(nBlocks)
+        maxFilters = nFilters
+        for block in range(nBlocks):
+            start = perf_counter()
+            for idx in range(blockSize):
+                if idx % 10 == 0:
+                    degenerate()
+                else:
+                    call()
+            blockCost[block] = (perf_counter() - start) / blockSize
+            maxFilters = max(maxFilters, len(warnings.filters))
+        first, last = np.median(blockCost[:nBlocks//2]), np.median(blockCost[nBlocks//2:])
+        growth = last / first
+        ok = maxFilters == nFilters and growth <= maxGrowth
+        failed = failed or not ok
+        print(f"{'OK' if ok else 'FAIL'}: {name}, {blockSize*nBlocks} calls, {first*1e6:0.2f} -> {last*1e6:0.2f} us per call (x{growth:0.2f}), at most {maxFilters} warning filters (started with {nFilters})")
+    assert not failed, "the warnings filter list or the per-call cost grew"
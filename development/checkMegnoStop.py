@@ -0,0 +1,52 @@
+"""
+MEGNO early stop vs full-length runs. the first nRows treatments of
+data/Simulation.csv are run twice with the same rngSeed ( so both draw the
+same random speeds ): once with megnoStop, once to the full maxT. every row
+the MEGNO stop classified as a regular survivor must also survive the full
+run; a row that collides or ejects later means the stop is too eager.
+
+run from the repository root:
+    python development/checkMegnoStop.py [nRows]
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.getcwd())
+from pyFiles.Instrumentation import PhaseTimer
+from pyFiles.Simulation import Simulation
+from pyFiles.Telemetry import Telemetry
+
+nRows = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+rngSeed = 3
+
+def runRows(history, **kwargs):
+    # a bare Simulation on the first nRows treatments of history, run row by
+    # row without touching any saved state
+    sim = Simulation.__new__(Simulation)
+    sim.name_ = "Simulation"
+    sim._generateColumnNames()
+    sim.timer_ = PhaseTimer()
+    sim.telemetry_ = Telemetry(0, mode='off')
+    sample = history.iloc[:nRows][sim.colNames_['monteCarlo'] + sim.colNames_['control']].copy()
+    for colName in sim.colNames_['all']:
+        if colName not in sample: sample[colName] = np.nan
+    for colName in ['nSteps', 'collide', 'eject', 'survive']: sample[colName] = 0
+    sim.sample_ = sample.reset_index(drop=True)
+    for sampleRowIdx in range(nRows):
+        sim.sampleRowIdx_ = sampleRowIdx
+        sim._runScenario(earlyStop=True, rngSeed=rngSeed, **kwargs)
+    return sim.sample_
+
+if __name__ == "__main__":
+    history = pd.read_csv("data/Simulation.csv")
+    stopped = runRows(history, megnoStop=True)
+    full = runRows(history)
+    regular = stopped.index[stopped['megnoStop'] == 1]
+    wrong = [idx for idx in regular if full.loc[idx, 'survive'] != 1]
+    saved = 1 - stopped['nSteps'].sum() / full['nSteps'].sum()
+    print(f"{'OK' if len(wrong) == 0 else 'FAIL'}: {nRows} rows, {len(regular)} stopped as regular, {len(wrong)} of them don't survive the full run {wrong}, {saved:0.1%} of the steps saved")
+    assert len(wrong) == 0, "the MEGNO stop called rows regular that collide or eject later"
@@ -0,0 +1,69 @@
+"""
+serial vs parallel check of Simulation.run with triage turned on. a small
+sample is taken from the control factors of data/Simulation.csv, triaged with
+a surrogate fit on the rest of that file, and run once serially and once on 2
+workers ( with the same rngSeed, so both draw the same random speeds ). every
+row must come back with the same source, outcome, and step count.
+
+run from the repository root:
+    python development/checkParallelTriage.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.getcwd())
+import pyFiles.Input as inp
+from pyFiles.Instrumentation import PhaseTimer
+from pyFiles.Simulation import Simulation
+from pyFiles.Telemetry import Telemetry
+
+# short runs, this only checks bookkeeping
+inp.maxT = 50 * inp.yr2s
+nRows = 24
+
+def newSimulation(history):
+    # a bare Simulation on the first nRows treatments of history, without
+    # touching any saved state
+    sim = Simulation.__new__(Simulation)
+    sim.name_ = "Simulation"
+    sim._generateColumnNames()
+    sim.timer_ = PhaseTimer()
+    sim.telemetry_ = Telemetry(0, mode='off')
+    sample = history.iloc[:nRows][sim.colNames_['monteCarlo'] + sim.colNames_['control']].copy()
+    for colName in sim.colNames_['all']:
+        if colName not in sample: sample[colName] = np.nan
+    for colName in ['nSteps', 'collide', 'eject', 'survive']: sample[colName] = 0
+    sim.sample_ = sample.reset_index(drop=True)
+    sim.sampleRowIdx_ = 0
+    sim.runComplete_ = False
+    return sim
+
+if __name__ == "__main__":
+    history = pd.read_csv("data/Simulation.csv")
+    cwd = os.getcwd()
+    workDir = tempfile.mkdtemp()
+    try:
+        # saved state and csv go to the temporary directory
+        os.makedirs(os.path.join(workDir, "data"))
+        history.iloc[nRows:].to_csv(os.path.join(workDir, "data", "history.csv"), index=False)
+        shutil.copy("data/starClass.txt", os.path.join(workDir, "data"))
+        os.chdir(workDir)
+        results = {}
+        for nJobs in [1, 2]:
+            sim = newSimulation(history)
+            sim.run(triage=True, confidence=0.9, auditRate=0.1, surrogateData="data/history.csv", nJobs=nJobs, maxSteps=30, rngSeed=0, earlyStop=True, telemetry='off')
+            assert sim.runComplete_ and sim.sampleRowIdx_ == nRows, f"nJobs = {nJobs}: run didn't finish"
+            results[nJobs] = sim.sample_.sort_values(['treatmentN', 'monteCarloN']).reset_index(drop=True)
+        columns = ['treatmentN', 'monteCarloN', 'source', 'collide', 'eject', 'survive', 'nSteps', 'truncated']
+        serial, parallel = results[1][columns], results[2][columns]
+        pd.testing.assert_frame_equal(serial, parallel, check_dtype=False)
+        print(f"OK: {nRows} rows, {(serial['source'] == 'predicted').sum()} predicted, serial and parallel runs agree")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workDir)
@@ -3,6 +3,9 @@
 # import internal dependencies                                                  #
 #===============================================================================#
 
+from pyFiles.Instrumentation import PhaseTimer
+from pyFiles.Telemetry import Telemetry
+
 import pyFiles.Functions as fun
 import pyFiles.Input as inp
 
@@ -11,7 +14,7 @@ import pyFiles.Input as inp
 #===============================================================================#
 
 from copy import deepcopy
-from tqdm import tqdm
+from time import perf_counter
 import numpy as np
 import os
 import pandas as pd
@@ -23,6 +26,9 @@ import pdb
 
 class BaseClass:
 
+    # attributes that only live for the current run and are never pickled
+    transientAttributes = ['telemetry_', 'timer_']
+
     #===========================================================================#
     # constructor                                                               #
     #===========================================================================#
@@ -77,6 +83,12 @@ class BaseClass:
         # only set if not already present
         if not hasattr(self, 'runComplete_'): self.runComplete_ = False
 
+        # phase timer is disabled until a run asks for it
+        self.timer_ = PhaseTimer()
+
+        # silent progress telemetry until a run sets one up
+        self.telemetry_ = Telemetry(0, mode='off')
+
         # add any remaining kwargs as attributes, will override previous state
         # if any keys conflict
         self._dict2attributes(kwargs, message="Overriding Attributes", **kwargs1)
@@ -130,30 +142,65 @@ class BaseClass:
         ========================================================================
         None            None
         """
-        fun.toPickle( f"data/{self.name_}.pkl", self.__dict__, **kwargs )
+        state = {key:value for key,value in self.__dict__.items() if key not in self.transientAttributes}
+        fun.toPickle( f"data/{self.name_}.pkl", state, **kwargs )
 
     def run(self, **kwargs):
+        """
+        use:
+        runs every scenario left in sample_, saving state after each one.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+
+        kwargs:         type:           description:
+        instrument      bool            accumulate wall time and call counts
+                                        per phase, default = False
+        telemetry       str             progress report mode: 'bar', 'json',
+                                        or 'off', default = 'bar'
+        telemetryInterval float         minimum seconds between progress
+                                        reports, default = 1.0
+        (any other kwargs are passed on to _runScenario)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        instrument = kwargs.pop('instrument') if 'instrument' in kwargs else False
+        telemetry = kwargs.pop('telemetry') if 'telemetry' in kwargs else 'bar'
+        telemetryInterval = kwargs.pop('telemetryInterval') if 'telemetryInterval' in kwargs else 1.0
+        # fresh run-level timer; children time their own phases with it
+        self.timer_ = PhaseTimer(enabled=instrument)
+        runScenario = self.timer_.wrap('scenario', self._runScenario)
+        saveState = self.timer_.wrap('save', self.saveState)
+        runStart = perf_counter()
         # find number of scenarios left to run
         nRun = self.sample_.shape[0] - self.sampleRowIdx_
-        # make a manual progress bar
-        pbar = tqdm(total=nRun)
+        # time based progress reports; children add steps and outcomes to it
+        self.telemetry_ = Telemetry(nRun, mode=telemetry, interval=telemetryInterval, name=self.name_)
         while not self.runComplete_:
             # run the treatement for current treatement, specified by
             # sampleRowIdx
-            self._runScenario(**kwargs)
+            runScenario(**kwargs)
             # increment sampleRowIdx
             self.sampleRowIdx_ += 1
             # evaluate run completion conditions, if the sample row index is
             # greater than the number of rows in sample_
             self.runComplete_ = (self.sampleRowIdx_ == self.sample_.shape[0])
             # save current state of sim model
-            self.saveState()
-            # update progress bar
-            pbar.update()
-        # close progress bar
-        pbar.close()
+            saveState()
+            # report progress
+            self.telemetry_.update(scenarios=1)
+        # final progress report
+        self.telemetry_.close()
         fun.printHeader(f"finished {self.name_} scenarios!", verbose=True)
         self.sample_.to_csv(f"data/{self.name_}.csv", index=False)
+        if instrument:
+            self.timer_.add('run', perf_counter() - runStart)
+            self.timer_.writeSummary(f"data/{self.name_}_timing.csv", verbose=True)
 
     #===========================================================================#
     # public methods                                                            #
@@ -33,8 +33,6 @@ import os
 import pandas as pd
 import pdb
 import pickle
-import warnings
-warnings.filterwarnings('error')
 
 #===============================================================================#
 # auxillary                                                                     #
@@ -157,11 +155,17 @@ def xyz2spc(x_i3, **kwargs):
     spc = np.zeros( x_i3.shape ) # AU
 
     spc[:,0] = r # AU
-    try:
-        spc[:,1] = np.arctan( rho / x_i3[:,2] ) # radians
-    except:
-        spc[:,1] = np.pi/2
-    spc[:,2] = np.arctan( x_i3[:,1] / x_i3[:,0] ) # radians
+
+    # x / 0 --> +/- inf is the limit we want ( arctan --> +/- pi/2 ); 0 / 0 is
+    # masked out below
+    with np.errstate( divide='ignore', invalid='ignore' ):
+        theta = np.arctan( rho / x_i3[:,2] ) # radians
+        phi   = np.arctan( x_i3[:,1] / x_i3[:,0] ) # radians
+
+    # on the z-axis ( or at the origin ) theta is pi/2
+    spc[:,1] = np.where( x_i3[:,2] == 0, np.pi/2, theta ) # radians
+    # on the z-axis phi is undefined, call it 0
+    spc[:,2] = np.where( ( x_i3[:,0] == 0 ) & ( x_i3[:,1] == 0 ), 0.0, phi ) # radians
 
     return spc # [ AU, radians, radians ]
 
@@ -274,24 +278,29 @@ def saveFigure(toFile, fig, **kwargs):
 #===============================================================================#
 
 def escapeSpeed(x_i3, m_i1):
-
-    warnings.filterwarnings("ignore", message="divide by zero encountered in true_divide" )
+    """
+    escape speed of each body from the rest of the system, in N-body units
+    ( G = 1; multiply by inp.nbodyV for km/s ).
+    """
 
     # find the pair-wise distances
-    x_ij = pairwiseDistance( x_i3 ) # AU
+    x_ij = pairwiseDistance( x_i3 ) # L
+
+    # inverse distances, masking the self pairs ( and any overlapping pairs )
+    # so they contribute nothing
+    inv_ij = np.divide( 1, x_ij, out=np.zeros_like( x_ij ), where=( x_ij > 0 ) ) # L^-1
 
     # calculate intermidiary result
-    alpha_ij = m_i1 / x_ij + m_i1.T / x_ij # solar mass AU^-1
-    np.nan_to_num( alpha_ij, posinf=0, copy=False )
+    alpha_ij = ( m_i1 + m_i1.T ) * inv_ij # M L^-1
 
     # sum up all ( mass : distance ) contributions along axis = 1 = j,
     # "from body"
-    alpha_i1 = alpha_ij.sum( axis=1, keepdims=True ) # solar mass AU^-1
+    alpha_i1 = alpha_ij.sum( axis=1, keepdims=True ) # M L^-1
 
     # calculate escape speed for all stars
-    speed_i1 = np.sqrt( 2 * inp.G * alpha_i1 ) # km/s
+    speed_i1 = np.sqrt( 2 * alpha_i1 ) # V
 
-    return speed_i1 # km/s
+    return speed_i1 # V
 
 def nBodyAcceleration(x_i3, m_i1):
     """
@@ -299,31 +308,25 @@ def nBodyAcceleration(x_i3, m_i1):
     i --> on body
     j --> from body
     3 --> xyz spatial vector
+
+    accelerations in N-body units ( G = 1 )
     """
 
     # find pair-wise difference vectors
-    x_ij3 = pairwiseDifferenceVector( x_i3 ) # AU
+    x_ij3 = pairwiseDifferenceVector( x_i3 ) # L
 
     # find pair-wise distances
-    x_ij = pairwiseDistance( x_ij3 ) # AU
+    x_ij = pairwiseDistance( x_ij3 ) # L
     x_ij[ x_ij == 0 ] = 1
 
-    # find pair-wise force directions
-    hat_ij3 = x_ij3 / x_ij[:,:,None]
-
-    # find pair-wise mass product
-    m_ij = m_i1 * m_i1.T # (solar mass)^2
-
-    # find piece-wise force of gravity
-    f_ij3  = hat_ij3 * inp.G * m_ij[:,:,None] / x_ij[:,:,None]**2 # (solar mass) (km/s)^2 (AU)^-1
-    f_ij3 *= inp.km2au # (solar mass) (km/s^2)
+    # pair-wise ( from body mass ) / distance^3; the self pairs have a zero
+    # difference vector so they drop out
+    w_ij = m_i1.T / x_ij**3 # M L^-3
 
-    # sum up forces along ( 1 - from body ) to get forces on bodies
-    f_i3 = f_ij3.sum( axis=1 ) # (solar mass) (km/s^2)
-
-    # get acellerations on bodies
-    a_i3 = f_i3 / m_i1 # km/s^2
-    return a_i3 # km/s^2
+    # sum up contributions along ( 1 - from body ) to get accelerations on
+    # bodies
+    a_i3 = ( x_ij3 * w_ij[:,:,None] ).sum( axis=1 ) # L T^-2
+    return a_i3 # L T^-2
 
 def pairwiseDifferenceVector(x_i3):
     x_ij3 = x_i3 - x_i3[:,None,:] # AU
@@ -346,85 +349,140 @@ def pairwiseDistance(x):
 def nBodyRungeKutta4(time, dt, x_i3, xdot_i3, m_i1):
     """
     http://spiff.rit.edu/richmond/nbody/OrbitRungeKutta4.pdf
+
+    everything in N-body units ( G = 1 ), so no conversions between stages.
     """
 
     # find coefficients for RK4
-    kr1  = xdot_i3 # km/s
-    kr1 *= inp.km2au # AU/s
-    kv1  = nBodyAcceleration(x_i3, m_i1) # km/s^2
+    kr1  = xdot_i3 # V
+    kv1  = nBodyAcceleration(x_i3, m_i1) # L T^-2
 
-    kr2  = xdot_i3 + kv1 * dt/2 # km/s
-    kr2 *= inp.km2au # AU/s
-    kv2  = nBodyAcceleration(x_i3 + kr1 * dt/2, m_i1) # km/s^2
+    kr2  = xdot_i3 + kv1 * dt/2 # V
+    kv2  = nBodyAcceleration(x_i3 + kr1 * dt/2, m_i1) # L T^-2
 
-    kr3  = xdot_i3 + kv2 * dt/2 # km/s
-    kr3 *= inp.km2au # AU/s
-    kv3  = nBodyAcceleration(x_i3 + kr2 * dt/2, m_i1) # km/s^2
+    kr3  = xdot_i3 + kv2 * dt/2 # V
+    kv3  = nBodyAcceleration(x_i3 + kr2 * dt/2, m_i1) # L T^-2
 
-    kr4  = xdot_i3 + kv3 * dt # km/s
-    kr4 *= inp.km2au # AU/s
-    kv4  = nBodyAcceleration(x_i3 + kr3 * dt, m_i1) # km/s^2
+    kr4  = xdot_i3 + kv3 * dt # V
+    kv4  = nBodyAcceleration(x_i3 + kr3 * dt, m_i1) # L T^-2
 
     # update positions and velocities
-    dx_i3 = (dt/6) * (kr1 + 2*kr2 + 2*kr3 + kr4) # AU
-    dv_i3 = (dt/6) * (kv1 + 2*kv2 + 2*kv3 + kv4) # km/s
+    dx_i3 = (dt/6) * (kr1 + 2*kr2 + 2*kr3 + kr4) # L
+    dv_i3 = (dt/6) * (kv1 + 2*kv2 + 2*kv3 + kv4) # V
     # update positions and velocities
-    x_i3 += dx_i3 # AU
-    xdot_i3 += dv_i3 # km/s
-
-    # # euler - change in velocities and positions
-    # dv_i3_e = nBodyAcceleration(x_i3, m_i1) * dt # km/s
-    # dx_i3_e = dv_i3_e * inp.km2au * dt # AU
-    # # euler - update velocities and positions
-    # xdot_i3 += dv_i3_e
-    # x_i3 += dx_i3_e
+    x_i3 += dx_i3 # L
+    xdot_i3 += dv_i3 # V
 
     # shift positions relative to CM
-    CM_13 = findCM( x_i3, m_i1 ) # AU
-    x_i3 -= CM_13 # AU
-
-    # #DEBUG MODE
-    # if checkEjection(x_i3, xdot_i3, m_i1):
-    #     vmax = escapeSpeed(x_i3, m_i1)
-    #     dv_i3_e = nBodyAcceleration(x_i3, m_i1) * dt # km/s
-    #     dx_i3_e = dv_i3_e * inp.km2au * dt # AU
-    #     dt_e = timeStep( dx_i3_e, dv_i3_e ) # s
-    #     print("ejection")
-    #     pdb.set_trace()
-    # if np.any(np.all(dv_i3 == 0, axis=1)):
-    #     print("0 speed")
-    #     pdb.set_trace()
+    CM_13 = findCM( x_i3, m_i1 ) # L
+    x_i3 -= CM_13 # L
 
     # update time
-    time += dt # s
-    # update time-step
-    # dt = timeStep( dx_i3, dv_i3 ) # s
+    time += dt # T
 
     # output time, time-step, positions, and velocities
-    return time, dt, x_i3, xdot_i3 # s, s, AU, km/s
+    return time, dt, x_i3, xdot_i3 # T, T, L, V
+
+def nBodyTangentAcceleration(x_i3, dx_i3, m_i1):
+    """
+    linearized accelerations of a tangent ( variational ) displacement dx_i3
+    about the positions x_i3, in N-body units ( G = 1 ).
+    """
+
+    # find pair-wise difference vectors and distances
+    x_ij3 = pairwiseDifferenceVector( x_i3 ) # L
+    dx_ij3 = pairwiseDifferenceVector( dx_i3 ) # L
+    x_ij = pairwiseDistance( x_ij3 ) # L
+    x_ij[ x_ij == 0 ] = 1
+
+    # d/dx of ( m_j x_ij / r^3 ): m_j ( dx_ij / r^3 - 3 ( x_ij . dx_ij ) x_ij / r^5 )
+    w_ij = m_i1.T / x_ij**3 # M L^-3
+    projection_ij = ( x_ij3 * dx_ij3 ).sum( axis=2 ) / x_ij**2 # 1
+    da_i3 = ( ( dx_ij3 - 3 * projection_ij[:,:,None] * x_ij3 ) * w_ij[:,:,None] ).sum( axis=1 ) # L T^-2
+    return da_i3 # L T^-2
+
+def nBodyVariationalRungeKutta4(time, dt, x_i3, xdot_i3, dx_i3, dxdot_i3, m_i1):
+    """
+    nBodyRungeKutta4 with a tangent vector ( dx_i3, dxdot_i3 ) carried along
+    by the variational equations in the same RK4 stages, so the trajectory
+    is identical to nBodyRungeKutta4's.
+    """
+
+    # find coefficients for RK4
+    kr1  = xdot_i3 # V
+    kv1  = nBodyAcceleration(x_i3, m_i1) # L T^-2
+    kdr1 = dxdot_i3
+    kdv1 = nBodyTangentAcceleration(x_i3, dx_i3, m_i1)
+
+    kr2  = xdot_i3 + kv1 * dt/2 # V
+    kv2  = nBodyAcceleration(x_i3 + kr1 * dt/2, m_i1) # L T^-2
+    kdr2 = dxdot_i3 + kdv1 * dt/2
+    kdv2 = nBodyTangentAcceleration(x_i3 + kr1 * dt/2, dx_i3 + kdr1 * dt/2, m_i1)
+
+    kr3  = xdot_i3 + kv2 * dt/2 # V
+    kv3  = nBodyAcceleration(x_i3 + kr2 * dt/2, m_i1) # L T^-2
+    kdr3 = dxdot_i3 + kdv2 * dt/2
+    kdv3 = nBodyTangentAcceleration(x_i3 + kr2 * dt/2, dx_i3 + kdr2 * dt/2, m_i1)
+
+    kr4  = xdot_i3 + kv3 * dt # V
+    kv4  = nBodyAcceleration(x_i3 + kr3 * dt, m_i1) # L T^-2
+    kdr4 = dxdot_i3 + kdv3 * dt
+    kdv4 = nBodyTangentAcceleration(x_i3 + kr3 * dt, dx_i3 + kdr3 * dt, m_i1)
+
+    # update positions, velocities, and the tangent vector
+    x_i3 += (dt/6) * (kr1 + 2*kr2 + 2*kr3 + kr4) # L
+    xdot_i3 += (dt/6) * (kv1 + 2*kv2 + 2*kv3 + kv4) # V
+    dx_i3 += (dt/6) * (kdr1 + 2*kdr2 + 2*kdr3 + kdr4)
+    dxdot_i3 += (dt/6) * (kdv1 + 2*kdv2 + 2*kdv3 + kdv4)
+
+    # shift positions relative to CM ( a translation, the tangent vector
+    # doesn't change )
+    CM_13 = findCM( x_i3, m_i1 ) # L
+    x_i3 -= CM_13 # L
+
+    # update time
+    time += dt # T
+
+    return time, dt, x_i3, xdot_i3, dx_i3, dxdot_i3 # T, T, L, V, -, -
+
+def megnoRate(x_i3, dx_i3, dxdot_i3, m_i1):
+    """
+    instantaneous stretching rate ( d delta / dt ) . delta / ( delta . delta )
+    of the tangent vector delta = ( dx_i3, dxdot_i3 ); MEGNO is its time
+    weighted average ( see Simulation.runScenario ).
+    """
+    ddxdot_i3 = nBodyTangentAcceleration(x_i3, dx_i3, m_i1)
+    return ( (dx_i3 * dxdot_i3).sum() + (dxdot_i3 * ddxdot_i3).sum() ) / ( (dx_i3**2).sum() + (dxdot_i3**2).sum() )
+
+def orbitalPeriod(x_i3, m_i1):
+    """
+    Kepler period of the outermost body about the system's CM with the whole
+    mass inside, in N-body units ( G = 1 ); the slowest orbital time scale of
+    the system ( see Simulation.setupScenario ).
+    """
+    r_1 = np.sqrt( ( ( x_i3 - findCM( x_i3, m_i1 ) )**2 ).sum( axis=1 ) ) # L
+    return 2 * np.pi * np.sqrt( r_1.max()**3 / m_i1.sum() ) # T
 
 def timeStep(dx_i3, dv_i3, **kwargs):
+    """
+    time-step in N-body units from displacements ( L ) and velocities ( V ).
+    """
 
     initial = kwargs['initial'] if 'initial' in kwargs else False
     scale = kwargs['scale'] if 'scale' in kwargs else 1
 
     # if finding initial time step, x_i3 is position vectors
-    dx_1 = np.sqrt( ( dx_i3**2 ).sum( axis=1 ) ) # AU
+    dx_1 = np.sqrt( ( dx_i3**2 ).sum( axis=1 ) ) # L
 
     if initial: dx_1 *= scale
 
-    # convert dx_1 from AU --> km
-    dx_1 /= inp.km2au # km
-
     # find the speeds
-    dv_1 = np.sqrt( ( dv_i3**2 ).sum( axis=1 ) ) # km/s
-    # calulate time step, take the minimum quotient
-    try:
-        delta_t = ( dx_1 / dv_1 ).min() # s
-    except:
-        print("time-step")
-        pdb.set_trace()
-    return delta_t # s
+    dv_1 = np.sqrt( ( dv_i3**2 ).sum( axis=1 ) ) # V
+    # calulate time step, take the minimum quotient; bodies that aren't
+    # moving don't limit the time step
+    quotient_1 = np.divide( dx_1, dv_1, out=np.full_like( dx_1, np.inf ), where=( dv_1 > 0 ) ) # T
+    delta_t = quotient_1.min() # T
+    return delta_t # T
 
 #===============================================================================#
 # meta model auxillary Functions                                                #
@@ -433,12 +491,12 @@ def timeStep(dx_i3, dv_i3, **kwargs):
 def oneHotEncodeY(y, **kwargs):
     K = kwargs['K'] if 'K' in kwargs else len(set(y))
     Y = np.zeros((y.shape[0],K))
-    for idx,val in enumerate(y):
-        Y[idx,val] = 1
+    Y[np.arange(y.shape[0]), y] = 1
     return Y
 
 def softmax(H):
-    eH = np.exp(H)
+    # shift by the row max so exp can't overflow; softmax is shift invariant
+    eH = np.exp(H - H.max(axis=1, keepdims=True))
     return eH / eH.sum(axis=1, keepdims=True)
 
 def shuffle(*args, **kwargs):
@@ -478,6 +536,73 @@ def confusionMatrix(Y, Yhat, **kwargs):
     if normalized: CM /= CM.sum()
     return CM
 
+def confusionMatrices(y, yhat, **kwargs):
+    """
+    use:
+    confusion matrices of many models at once from integer labels, all counted
+    with a single bincount. CMs[m] is the same matrix confusionMatrix gives
+    for the one-hot labels of model m.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    y               np.ndarray      (N,) actual labels, or (M,N) if they
+                                    differ between models
+    yhat            np.ndarray      (M,N) predicted labels, one row per model,
+                                    or (N,) for a single model
+
+    kwargs:         type:           description:
+    K               int             number of classes, default = largest label
+                                    + 1
+    normalized      bool            divide each matrix by its sum, default =
+                                    True
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    CMs             np.ndarray      (M,K,K) actual (rows) vs predicted (columns)
+    """
+    yhat = np.atleast_2d(yhat)
+    y = np.broadcast_to(y, yhat.shape)
+    K = kwargs['K'] if 'K' in kwargs else int(max(y.max(), yhat.max())) + 1
+    normalized = kwargs['normalized'] if 'normalized' in kwargs else True
+    M = yhat.shape[0]
+    # flat index of (model, actual, predicted) for every prediction
+    flat = (np.arange(M)[:,None]*K + y)*K + yhat
+    CMs = np.bincount(flat.ravel(), minlength=M*K*K).reshape(M,K,K).astype(np.float64)
+    if normalized: CMs /= CMs.sum(axis=(1,2), keepdims=True)
+    return CMs
+
+def batchMetrics(CMs):
+    """
+    use:
+    accuracy, precision, and recall for a stack of confusion matrices, each
+    computed the same way as the single CM forms of accuracy, precision, and
+    recall.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    CMs             np.ndarray      (M,K,K) confusion matrices
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    metrics         dict            'accuracy' (M,), 'precision' (M,K), and
+                                    'recall' (M,K)
+    """
+    diagonal = np.diagonal(CMs, axis1=1, axis2=2)
+    total = CMs.sum(axis=(1,2))
+    rowSums = CMs.sum(axis=2)
+    colSums = CMs.sum(axis=1)
+    return {
+        'accuracy'  : diagonal.sum(axis=1) / total,
+        'precision' : diagonal / np.where(rowSums==0, 1, rowSums),
+        'recall'    : diagonal / np.where(colSums==0, 1, colSums),
+    }
+
 def falseNegative(Y, Yhat):
     """
     find counts where prediction and actual are different and where prediction
@@ -696,7 +821,10 @@ def printList(list1, **kwargs):
 # random generator                                                              #
 #===============================================================================#
 
-def randomSpeed(maxSpeed_i1):
+def randomSpeed(maxSpeed_i1, **kwargs):
+
+    # random stream to draw from, default = numpy's global one
+    rng = kwargs['rng'] if 'rng' in kwargs else np.random
 
     # make empty array with same shape as input
     spcdot_i3 = np.zeros( maxSpeed_i1.shape ) # km/s
@@ -715,7 +843,7 @@ def randomSpeed(maxSpeed_i1):
         speed = np.linspace( *speedArgs ) # km/s
 
         # select random index
-        randIdx = np.random.randint( speedArgs[2] ) # int
+        randIdx = rng.randint( speedArgs[2] ) # int
 
         # fill in random radial value and dicrection
         spcdot_i3[ starIdx, 0 ] = speed[ randIdx ] # km/s
@@ -727,7 +855,6 @@ def randomSpeed(maxSpeed_i1):
 #===============================================================================#
 
 def checkCollision(x_i3, r_i1):
-    # warnings.filterwarnings('error')
 
     # find the pair-wise distance for each body
     x_ij = pairwiseDistance( x_i3 ) # AU
@@ -743,17 +870,83 @@ def checkCollision(x_i3, r_i1):
     return collide
 
 def checkEjection(x_i3, xdot_i3, m_i1, **kwargs):
-    # warnings.filterwarnings('error')
 
     ejectSF = kwargs['ejectSF'] if 'ejectSF' in kwargs else 1
 
     # determine the escape velocity from the system for each body
-    vEscape_i1 = escapeSpeed(x_i3, m_i1) # km/s
+    vEscape_i1 = escapeSpeed(x_i3, m_i1) # V
 
     # calculate the speed of each body
-    speed_i1 = np.sqrt((xdot_i3**2).sum(axis=1, keepdims=True)) # km/s
+    speed_i1 = np.sqrt((xdot_i3**2).sum(axis=1, keepdims=True)) # V
 
     # determine any eminent ejections
-    ejections = (speed_i1 > vEscape_i1 * ejectSF) # km/s
+    ejections = (speed_i1 > vEscape_i1 * ejectSF) # bool
     eject = np.any(ejections) # bool
     return eject
+
+#===============================================================================#
+# scenario margins                                                              #
+#===============================================================================#
+
+def escapeRatio(x_i3, xdot_i3, m_i1):
+    """
+    largest speed / escape speed of any body; checkEjection flags an ejection
+    when this is above ejectSF.
+    """
+    speed_i1 = np.sqrt((xdot_i3**2).sum(axis=1, keepdims=True)) # V
+    return (speed_i1 / escapeSpeed(x_i3, m_i1)).max()
+
+def nBodyEnergy(x_i3, xdot_i3, m_i1):
+    """
+    total ( kinetic + potential ) energy of the system, in N-body units.
+    """
+    x_ij = pairwiseDistance( x_i3 ) # L
+    inv_ij = np.divide( 1, x_ij, out=np.zeros_like( x_ij ), where=( x_ij > 0 ) ) # L^-1
+    kinetic = 0.5 * ( m_i1 * xdot_i3**2 ).sum()
+    # each pair shows up twice in the matrix
+    potential = -0.5 * ( m_i1 * m_i1.T * inv_ij ).sum()
+    return kinetic + potential
+
+def separationRatio(x_i3, r_i1):
+    """
+    smallest pair-wise distance / sum of radii; checkCollision flags a
+    collision when this is below 1.
+    """
+    x_ij = pairwiseDistance( x_i3 ) # L
+    r_ij = r_i1 + r_i1.T # L
+    np.fill_diagonal(x_ij, np.inf)
+    return (x_ij / r_ij).min()
+
+
+#===============================================================================#
+# replicate statistics                                                          #
+#===============================================================================#
+
+def wilsonHalfWidth(k, n, **kwargs):
+    """
+    use:
+    half width of the Wilson score interval on a rate estimated as k / n;
+    unlike the normal approximation it doesn't collapse to 0 when k is 0 or n.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    k               np.ndarray      successes
+    n               np.ndarray      trials
+
+    kwargs:         type:           description:
+    z               float           standard normal quantile, default = 1.96
+                                    (95%)
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    halfWidth       np.ndarray      0.5 where n is 0
+    """
+    z = kwargs['z'] if 'z' in kwargs else 1.96
+    k, n = np.asarray(k, dtype=np.float64), np.asarray(n, dtype=np.float64)
+    safeN = np.maximum(n, 1)
+    p = k / safeN
+    halfWidth = z * np.sqrt(p*(1 - p)/safeN + z**2/(4*safeN**2)) / (1 + z**2/safeN)
+    return np.where(n > 0, halfWidth, 0.5)
@@ -51,6 +51,21 @@ kyr2s = yr2s * 1e3
 # gravitational constant ( km/s )^2 ( AU )^1 ( solar mass )^-1
 G = 6.67408e-11 * m2km**2 * m2au / kg2solar
 
+#===============================================================================#
+# internal N-body units                                                         #
+#===============================================================================#
+
+# the integrator works in units where G = 1. conversions to AU, km/s, and s
+# only happen when a scenario is set up and when it is recorded.
+# length unit ( AU )
+nbodyL = 1.0
+# mass unit ( solar mass )
+nbodyM = 1.0
+# time unit ( s ), ~ 1 yr / 2 pi
+nbodyT = np.sqrt( nbodyL**3 / ( G * km2au**2 * nbodyM ) )
+# velocity unit ( km/s ), ~ 30 km/s
+nbodyV = nbodyL / nbodyT / km2au
+
 #===============================================================================#
 # simulation parameters                                                         #
 #===============================================================================#
@@ -102,6 +117,10 @@ dt0ScaleFactor = 1e-3
 # initial time delta
 # dt0 = month2s
 dt0 = yr2s/2
+# number of force evaluations per RK4 step
+rk4ForceEvals = 4
+# number of steps between telemetry heartbeats from inside a scenario
+telemetryStride = 256
 
 # sample file name
 sampleFileName = "data/CUR_3Body_in.csv"
@@ -132,3 +151,17 @@ RFclassifierParameterMap = {
     'max_depth' : [None] + [x for x in range(1,10)],
     'min_samples_leaf' : [x for x in range(2,10)]
 }
+
+LogisticRegressionParameterMap = {
+    'eta' : [0.01, 0.1, 1],
+    'batchSize' : [None, 256],
+    'l2' : [0, 1e-4, 1e-2],
+    'patience' : [None, 20]
+}
+
+HGBclassifierParameterMap = {
+    'max_iter' : [25, 50, 100, 200, 400],
+    'learning_rate' : [0.05, 0.1, 0.2],
+    'max_leaf_nodes' : [15, 31, 63],
+    'min_samples_leaf' : [10, 20, 50]
+}
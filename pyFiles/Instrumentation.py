@@ -0,0 +1,357 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+import pyFiles.Functions as fun
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+from contextlib import contextmanager
+import cProfile
+import io
+import os
+import pandas as pd
+import pstats
+import sys
+import threading
+from time import perf_counter, sleep
+import tracemalloc
+
+#===============================================================================#
+# PhaseTimer definition                                                         #
+#===============================================================================#
+
+class PhaseTimer:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, enabled=False):
+        """
+        use:
+        accumulates wall time and call counts for named phases of a run. when
+        not enabled, wrap hands back the original function untouched, so the
+        instrumentation costs nothing in the hot loop.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        enabled         bool            whether to time anything, default =
+                                        False
+
+        kwargs:         type:           description:
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        self.enabled_ = enabled
+        self.time_ = {}
+        self.calls_ = {}
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def add(self, phase, seconds, calls=1):
+        """
+        use:
+        adds wall time and a number of calls to a phase.
+        """
+        self.time_[phase] = self.time_.get(phase, 0.0) + seconds
+        self.calls_[phase] = self.calls_.get(phase, 0) + calls
+
+    def columns(self):
+        """
+        use:
+        collects the accumulated values as result columns, eg
+        'wallTime_(rk4)' and 'nCalls_(rk4)'.
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        results         dict            {column name : value}
+        """
+        results = {}
+        for phase in self.time_:
+            results[f"wallTime_({phase})"] = self.time_[phase]
+            results[f"nCalls_({phase})"] = self.calls_[phase]
+        return results
+
+    def merge(self, other):
+        """
+        use:
+        adds the phases accumulated by another PhaseTimer to this one.
+        """
+        for phase in other.time_:
+            self.add(phase, other.time_[phase], other.calls_[phase])
+
+    def summary(self):
+        """
+        use:
+        run-level summary of all phases, sorted by total wall time. phases
+        can be nested, so fraction is relative to the outermost (longest)
+        phase rather than to the sum.
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        summary         pd.DataFrame    columns: phase, wallTime, nCalls,
+                                        perCall, fraction
+        """
+        summary = pd.DataFrame({
+            'phase'     : list(self.time_.keys()),
+            'wallTime'  : list(self.time_.values()),
+            'nCalls'    : [self.calls_[phase] for phase in self.time_],
+        })
+        summary['perCall'] = summary.wallTime / summary.nCalls.clip(lower=1)
+        summary['fraction'] = summary.wallTime / max(summary.wallTime.max(), 1e-12)
+        return summary.sort_values('wallTime', ascending=False).reset_index(drop=True)
+
+    def wrap(self, phase, func):
+        """
+        use:
+        returns func when the timer is disabled; otherwise returns a wrapper
+        that times every call of func under phase.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        phase           str             name to accumulate the time under
+        func            callable        function to time
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        func            callable
+        """
+        if not self.enabled_: return func
+
+        def timed(*args, **kwargs):
+            t0 = perf_counter()
+            out = func(*args, **kwargs)
+            self.add(phase, perf_counter() - t0)
+            return out
+
+        return timed
+
+    def writeSummary(self, toFile, **kwargs):
+        """
+        use:
+        saves the run-level summary as csv and prints it if verbose.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        toFile          str             csv file name to save at
+
+        kwargs:         type:           description:
+        verbose         bool            flag to print, default = False
+        """
+        summary = self.summary()
+        summary.to_csv(toFile, index=False)
+        lines = [f"{row.phase}:\t{row.wallTime:0.3f} s\t{row.nCalls} calls\t{100*row.fraction:0.1f} %" for row in summary.itertuples()]
+        fun.printHeader("phase timing", *lines, f"saved timing summary to {toFile}", **kwargs)
+
+#===============================================================================#
+# SamplingProfiler definition                                                   #
+#===============================================================================#
+
+class SamplingProfiler:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, interval=1e-3):
+        """
+        use:
+        statistical profiler; a background thread looks at the stack of the
+        thread that started it every interval seconds and counts which
+        functions are on it. much lower overhead than cProfile for long runs.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        interval        float           seconds between samples, default = 1e-3
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        self.interval_ = interval
+        self.selfCounts_ = {}
+        self.totalCounts_ = {}
+        self.nSamples_ = 0
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def start(self):
+        self.__targetId = threading.get_ident()
+        self.__running = True
+        # the sampler only gets the GIL at switch intervals, so shorten them
+        self.__switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.interval_, self.__switchInterval))
+        self.__thread = threading.Thread(target=self.__sample, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        self.__running = False
+        self.__thread.join()
+        sys.setswitchinterval(self.__switchInterval)
+
+    def table(self):
+        """
+        use:
+        hot function table, sorted by the number of samples where the
+        function was executing (self) and then on the stack at all (total).
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        table           pd.DataFrame    columns: function, self, total,
+                                        selfFraction, totalFraction
+        """
+        table = pd.DataFrame({
+            'function'  : list(self.totalCounts_.keys()),
+            'total'     : list(self.totalCounts_.values()),
+        })
+        table['self'] = [self.selfCounts_.get(key, 0) for key in table.function]
+        table['selfFraction'] = table['self'] / max(self.nSamples_, 1)
+        table['totalFraction'] = table['total'] / max(self.nSamples_, 1)
+        table = table[['function', 'self', 'total', 'selfFraction', 'totalFraction']]
+        return table.sort_values(['self', 'total'], ascending=False).reset_index(drop=True)
+
+    #===========================================================================#
+    # semi-private methods                                                      #
+    #===========================================================================#
+
+    def __sample(self):
+        while self.__running:
+            frame = sys._current_frames().get(self.__targetId)
+            if frame is not None:
+                self.nSamples_ += 1
+                key = self.__frameKey(frame)
+                self.selfCounts_[key] = self.selfCounts_.get(key, 0) + 1
+                # count each function once per sample, even if recursive
+                seen = set()
+                while frame is not None:
+                    key = self.__frameKey(frame)
+                    if key not in seen:
+                        seen.add(key)
+                        self.totalCounts_[key] = self.totalCounts_.get(key, 0) + 1
+                    frame = frame.f_back
+            sleep(self.interval_)
+
+    def __frameKey(self, frame):
+        code = frame.f_code
+        fileName = code.co_filename
+        if fileName.startswith(os.getcwd()): fileName = os.path.relpath(fileName)
+        return f"{fileName}:{code.co_firstlineno}({code.co_name})"
+
+#===============================================================================#
+# stage profiling                                                               #
+#===============================================================================#
+
+@contextmanager
+def profileStage(stage, runDir, **kwargs):
+    """
+    use:
+    profiles everything run inside the with block and writes the results for
+    the stage into runDir:
+        {stage}.prof        cProfile dump (deterministic profiler only), can
+                            be loaded with pstats or snakeviz
+        {stage}_hot.txt     top-N hot functions
+        {stage}_memory.txt  tracemalloc peak and top-N allocation sites
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    stage           str             name of the stage, used for file names
+    runDir          str             directory to write the reports in
+
+    kwargs:         type:           description:
+    profiler        str             'cprofile' (deterministic) or 'sample'
+                                    (statistical), default = 'cprofile'
+    top             int             number of rows in the hot function and
+                                    allocation tables, default = 30
+    interval        float           seconds between samples for the sampling
+                                    profiler, default = 1e-3
+    verbose         bool            flag to print, default = False
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    None            None
+    """
+
+    profiler = kwargs['profiler'] if 'profiler' in kwargs else 'cprofile'
+    top = kwargs['top'] if 'top' in kwargs else 30
+    interval = kwargs['interval'] if 'interval' in kwargs else 1e-3
+
+    os.makedirs(runDir, exist_ok=True)
+    toFile = os.path.join(runDir, stage)
+
+    if profiler == 'cprofile':
+        prof = cProfile.Profile()
+    elif profiler == 'sample':
+        prof = SamplingProfiler(interval=interval)
+    else:
+        raise KeyError(f"OOPSIE! profiler '{profiler}' isn't implemented.\ntry entries like: 'cprofile' or 'sample'.")
+
+    tracemalloc.start()
+    t0 = perf_counter()
+    (prof.enable if profiler == 'cprofile' else prof.start)()
+    try:
+        yield
+    finally:
+        (prof.disable if profiler == 'cprofile' else prof.stop)()
+        wallTime = perf_counter() - t0
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # hot function table
+        if profiler == 'cprofile':
+            prof.dump_stats(f"{toFile}.prof")
+            stream = io.StringIO()
+            pstats.Stats(prof, stream=stream).sort_stats('cumulative').print_stats(top)
+            pstats.Stats(prof, stream=stream).sort_stats('tottime').print_stats(top)
+            hot = stream.getvalue()
+        else:
+            hot = f"{prof.nSamples_} samples every {interval} s\n\n" + prof.table().head(top).to_string()
+        with open(f"{toFile}_hot.txt", "w") as f:
+            f.write(f"stage: {stage}\nwall time: {wallTime:0.3f} s\n\n{hot}")
+
+        # peak memory report
+        lines = [
+            f"stage: {stage}",
+            f"peak traced memory: {peak/2**20:0.2f} MiB",
+            f"traced memory at end: {current/2**20:0.2f} MiB",
+            "",
+            f"top {top} allocation sites still held at end:",
+        ]
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:top]]
+        with open(f"{toFile}_memory.txt", "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        fun.printHeader(
+            f"profiled stage: {stage}",
+            f"wall time: {wallTime:0.3f} s",
+            f"peak traced memory: {peak/2**20:0.2f} MiB",
+            f"reports saved in {runDir}",
+            **kwargs
+        )
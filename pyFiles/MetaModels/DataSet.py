@@ -9,7 +9,7 @@ import pyFiles.Functions as fun
 # import external dependencies                                                  #
 #===============================================================================#
 
-import ipdb
+import numpy as np
 
 #===============================================================================#
 # Simulation definition                                                         #
@@ -21,51 +21,90 @@ class DataSet:
     # constructor                                                               #
     #===========================================================================#
 
-    def __init__(self, simData, Xcols, Ycols):
+    def __init__(self, X, y, Xcols, Ycols):
+        """
+        use:
+        holds the factors and labels of sim data as contiguous, read-only numpy
+        arrays, built once. X() and y() hand back the same arrays on every
+        call, and the train/validate/test splits are row views (see view), so
+        nothing is sliced or copied in the fit/predict loop.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        X               np.ndarray      (N,D) factors, one row per scenario
+        y               np.ndarray      (N,) integer labels (index into Ycols)
+        Xcols           list            factor column names
+        Ycols           list            one-hot estimator column names
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
         # add attriutes
         self.Xcols_ = Xcols
         self.Ycols_ = Ycols
-        self.YhatCols_ = [f"{col}_hat" for col in Ycols]
         self.K_ = len(Ycols)
-        self.df_ = simData.copy()
-        for col in self.YhatCols_: self.df_[col] = 0
+        # factor matrix and integer labels
+        self.X_ = np.ascontiguousarray(X, dtype=np.float64)
+        self.y_ = np.ascontiguousarray(y)
+        self.Y_ = fun.oneHotEncodeY(self.y_, K=self.K_)
+        for array in [self.X_, self.y_, self.Y_]: array.flags.writeable = False
+        # predictions
+        self.yhat_ = np.zeros(self.y_.size, dtype=self.y_.dtype)
 
     #===========================================================================#
     # puplic methods                                                            #
     #===========================================================================#
 
     def update(self, Yhat):
-        # if feeding in 1D row, one-hot the array first
-        if len(Yhat.shape) == 1: Yhat = fun.oneHotEncodeY(Yhat, K=self.K_)
-        # update Yhat
-        self.df_[self.YhatCols_] = Yhat
+        # keep predictions as integer labels
+        if len(Yhat.shape) == 1:
+            self.yhat_ = np.asarray(Yhat, dtype=self.y_.dtype)
+        else:
+            self.yhat_ = Yhat.argmax(axis=1)
         # update confusion matrix
-        self.CM_ = fun.confusionMatrix(self.Y(), Yhat)
+        self.CM_ = fun.confusionMatrices(self.y_, self.yhat_, K=self.K_)[0]
         # update accuracy, precision, and recall
         try:
             self.accuracy_ = fun.accuracy(self.CM_)
             self.precision_ = fun.precision(self.CM_)
             self.recall_ = fun.recall(self.CM_)
-        except:
-            print("OOPSIE! something went wrong.\nEntering debugger")
-            ipdb.set_trace()
+        except Exception as error:
+            raise KeyError(f"OOPSIE! couldn't compute the metrics of {self.y_.size} predictions: {error}") from error
+
+    def view(self, start, stop):
+        """
+        use:
+        a DataSet of rows start:stop that shares the X, y, and Y arrays of this
+        one (numpy views, no copy). predictions and metrics are its own.
+        """
+        ds = DataSet.__new__(DataSet)
+        ds.Xcols_ = self.Xcols_
+        ds.Ycols_ = self.Ycols_
+        ds.K_ = self.K_
+        ds.X_ = self.X_[start:stop]
+        ds.y_ = self.y_[start:stop]
+        ds.Y_ = self.Y_[start:stop]
+        ds.yhat_ = np.zeros(ds.y_.size, dtype=ds.y_.dtype)
+        return ds
 
     def X(self):
-        return self.df_[self.Xcols_].values
+        return self.X_
 
     def Y(self):
-        return self.df_[self.Ycols_].values
+        return self.Y_
 
     def Yhat(self):
-        return self.df_[self.YhatCols_].values
+        return fun.oneHotEncodeY(self.yhat_, K=self.K_)
 
     def y(self):
-        Y = self.Y()
-        return Y.argmax(axis=1)
+        return self.y_
 
     def yhat(self):
-        Yhat = self.Yhat()
-        return Yhat.argmax(axis=1)
+        return self.yhat_
 
     #===========================================================================#
     # semp-protected methods                                                    #
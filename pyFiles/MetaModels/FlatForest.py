@@ -0,0 +1,128 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import numpy as np
+import os
+
+#===============================================================================#
+# export                                                                        #
+#===============================================================================#
+
+# node arrays written for each exported forest
+nodeArrays = ['feature', 'threshold', 'left', 'right', 'value', 'roots', 'classes']
+
+def exportForest(model, toDir):
+    """
+    use:
+    flattens the trees of a fitted sklearn forest into contiguous node arrays
+    (one .npy file each) that FlatForest can memory map. the children of every
+    tree are offset so they index straight into the flat arrays, and the leaf
+    class counts are stored normalized, the way the forest averages them.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    model           object          fitted RandomForestClassifier
+    toDir           str             directory to save the arrays in
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    None            None
+    """
+    arrays = {key:[] for key in nodeArrays if key != 'classes'}
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        isLeaf = tree.children_left == -1
+        arrays['feature'].append(np.where(isLeaf, 0, tree.feature))
+        arrays['threshold'].append(tree.threshold)
+        arrays['left'].append(np.where(isLeaf, -1, tree.children_left + offset))
+        arrays['right'].append(np.where(isLeaf, -1, tree.children_right + offset))
+        value = tree.value[:,0,:]
+        arrays['value'].append(value / np.where(value.sum(axis=1, keepdims=True) > 0, value.sum(axis=1, keepdims=True), 1))
+        arrays['roots'].append([offset])
+        offset += tree.node_count
+
+    os.makedirs(toDir, exist_ok=True)
+    dtypes = {'feature':np.int32, 'threshold':np.float64, 'left':np.int32, 'right':np.int32, 'value':np.float64, 'roots':np.int32}
+    for key,arrayList in arrays.items():
+        np.save(os.path.join(toDir, f"{key}.npy"), np.concatenate(arrayList).astype(dtypes[key]))
+    np.save(os.path.join(toDir, "classes.npy"), np.asarray(model.classes_))
+
+#===============================================================================#
+# FlatForest definition                                                         #
+#===============================================================================#
+
+class FlatForest:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, fromDir):
+        """
+        use:
+        pure numpy predictor for a forest saved with exportForest. the node
+        arrays are memory mapped read-only, so loading is instant and several
+        processes share the pages. every tree is walked for the whole batch at
+        once: one vectorized step per tree level instead of a python call per
+        point or per tree. predictions match the sklearn forest.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        fromDir         str             directory exportForest saved in
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        # plain ndarray views of the maps index faster than np.memmap
+        for key in nodeArrays:
+            setattr(self, f"{key}_", np.asarray(np.load(os.path.join(fromDir, f"{key}.npy"), mmap_mode='r')))
+        self.nTrees_ = self.roots_.size
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def apply(self, X):
+        """
+        use:
+        flat index of the leaf each point lands in, for every tree.
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        leaves          np.ndarray      (N,nTrees) node indices
+        """
+        # sklearn trees compare float32 factors against the thresholds
+        X = np.asarray(X, dtype=np.float32)
+        N = X.shape[0]
+        # one walker per (point, tree); only those not yet at a leaf move on
+        node = np.tile(self.roots_, N)
+        row = np.repeat(np.arange(N), self.nTrees_)
+        walking = np.flatnonzero(self.left_[node] >= 0)
+        while walking.size > 0:
+            current = node[walking]
+            goLeft = X[row[walking], self.feature_[current]] <= self.threshold_[current]
+            current = np.where(goLeft, self.left_[current], self.right_[current])
+            node[walking] = current
+            walking = walking[self.left_[current] >= 0]
+        return node.reshape(N, self.nTrees_)
+
+    def predict(self, X):
+        return np.asarray(self.classes_)[self.predict_proba(X).argmax(axis=1)]
+
+    def predict_proba(self, X):
+        return self.value_[self.apply(X)].mean(axis=1)
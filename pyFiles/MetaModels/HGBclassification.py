@@ -0,0 +1,50 @@
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+from pyFiles.MetaModels.MLbase import MLbase
+import pyFiles.Input as inp
+
+#===============================================================================#
+# GradientBoosting definition                                                   #
+#===============================================================================#
+
+class GradientBoosting(MLbase):
+
+    # boosting can be continued iteration by iteration along max_iter
+    warmStartParameter = 'max_iter'
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, *args, **kwargs):
+        super().__init__('HistGradientBoostingClassifier', *args, **kwargs)
+
+    #===========================================================================#
+    # semi-protected methods                                                    #
+    # required by MLbase OR BaseClass                                           #
+    #===========================================================================#
+
+    @staticmethod
+    def _newModel(**kwargs):
+        """
+        https://scikit-learn.org/stable/modules/generated/sklearn.ensemble.HistGradientBoostingClassifier.html
+
+        factors are binned into at most 255 histogram bins once, so each
+        boosting iteration costs roughly linear time in the number of rows.
+        early stopping is off unless asked for, so max_iter means the same
+        thing on small and large campaigns (and along a warm start ladder).
+        """
+        if 'early_stopping' not in kwargs: kwargs['early_stopping'] = False
+        return HistGradientBoostingClassifier(**kwargs)
+
+    def _getParameterMap(self, **kwargs):
+        self.parameterMap_ = inp.HGBclassifierParameterMap
@@ -0,0 +1,178 @@
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import numpy as np
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+from pyFiles.MetaModels.MLbase import MLbase
+import pyFiles.Functions as fun
+import pyFiles.Input as inp
+
+#===============================================================================#
+# LogisticRegression definition                                                 #
+#===============================================================================#
+
+class LogisticRegression(MLbase):
+
+    # the softmax has one column per outcome, even if a subset misses some
+    classCountParameter = 'K'
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, *args, **kwargs):
+        super().__init__('LogisticRegression', *args, **kwargs)
+
+    #===========================================================================#
+    # semi-protected methods                                                    #
+    # required by MLbase OR BaseClass                                           #
+    #===========================================================================#
+
+    @staticmethod
+    def _newModel(**kwargs):
+        return SoftmaxClassifier(**kwargs)
+
+    def _getParameterMap(self, **kwargs):
+        self.parameterMap_ = inp.LogisticRegressionParameterMap
+
+#===============================================================================#
+# SoftmaxClassifier definition                                                  #
+#===============================================================================#
+
+class SoftmaxClassifier:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, **kwargs):
+        """
+        use:
+        multinomial logistic regression trained with vectorized gradient
+        descent on the cross entropy of fun.softmax. the factors are
+        standardized with the training set mean and standard deviation, so
+        one learning rate works for every factor. has the fit / predict /
+        predict_proba / get_params / set_params interface the MLbase search
+        expects.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        kwargs:         type:           description:
+        eta             float           learning rate, default = 0.1
+        epochs          int             maximum passes over the training set,
+                                        default = 1000
+        batchSize       int             rows per gradient step, default = None
+                                        (full batch)
+        l2              float           L2 penalty on the weights, default = 0
+        patience        int             stop after this many epochs without a
+                                        better held out loss, default = None
+                                        (no early stopping)
+        valFraction     float           fraction of the training rows held out
+                                        for early stopping, default = 0.1
+        tol             float           smallest loss decrease that counts as
+                                        better, default = 1e-6
+        seed            int             seed for shuffling and the held out
+                                        rows, default = 0
+        K               int             number of outcomes, default = None
+                                        (largest label + 1; set it when a
+                                        training subset may miss the top
+                                        outcome)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        self.eta_ = 0.1
+        self.epochs_ = 1000
+        self.batchSize_ = None
+        self.l2_ = 0
+        self.patience_ = None
+        self.valFraction_ = 0.1
+        self.tol_ = 1e-6
+        self.seed_ = 0
+        self.K_ = None
+        self.set_params(**kwargs)
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def fit(self, X, y):
+        K = self.K_ if self.K_ is not None else int(y.max()) + 1
+        rng = np.random.RandomState(self.seed_)
+
+        # standardize the factors
+        self.mu_ = X.mean(axis=0)
+        self.sigma_ = np.where(X.std(axis=0) > 0, X.std(axis=0), 1)
+        X = (X - self.mu_) / self.sigma_
+        Y = fun.oneHotEncodeY(y, K=K)
+
+        # hold out rows to early stop on
+        if self.patience_ is not None:
+            order = rng.permutation(y.size)
+            nVal = max(int(self.valFraction_ * y.size), 1)
+            Xval, Yval = X[order[:nVal]], Y[order[:nVal]]
+            X, Y = X[order[nVal:]], Y[order[nVal:]]
+
+        N,D = X.shape
+        self.classes_ = np.arange(K)
+        self.W_ = np.zeros((D,K))
+        self.b_ = np.zeros(K)
+        batchSize = N if self.batchSize_ is None else min(self.batchSize_, N)
+
+        best = np.inf
+        bestParams = (self.W_.copy(), self.b_.copy())
+        wait = 0
+        for epoch in range(self.epochs_):
+            order = rng.permutation(N) if batchSize < N else None
+            for start in range(0, N, batchSize):
+                rows = order[start:start+batchSize] if order is not None else slice(None)
+                Xb, Yb = X[rows], Y[rows]
+                # gradient of the mean cross entropy plus the L2 penalty
+                dH = (fun.softmax(Xb @ self.W_ + self.b_) - Yb) / Yb.shape[0]
+                self.W_ -= self.eta_ * (Xb.T @ dH + self.l2_ * self.W_)
+                self.b_ -= self.eta_ * dH.sum(axis=0)
+            if self.patience_ is None: continue
+            loss = self.__crossEntropy(Xval, Yval)
+            if loss < best - self.tol_:
+                best, bestParams, wait = loss, (self.W_.copy(), self.b_.copy()), 0
+            else:
+                wait += 1
+                if wait >= self.patience_: break
+        if self.patience_ is not None: self.W_, self.b_ = bestParams
+        self.nEpochs_ = epoch + 1
+        return self
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+    def predict_proba(self, X):
+        return fun.softmax(((X - self.mu_) / self.sigma_) @ self.W_ + self.b_)
+
+    def get_params(self, deep=True):
+        return {key:getattr(self, f"{key}_") for key in ['eta', 'epochs', 'batchSize', 'l2', 'patience', 'valFraction', 'tol', 'seed', 'K']}
+
+    def set_params(self, **kwargs):
+        # only the constructor parameters, like sklearn estimators
+        params = self.get_params()
+        for key,value in kwargs.items():
+            if key not in params:
+                raise ValueError(f"OOPSIE! '{key}' isn't a SoftmaxClassifier parameter.\ntry entries like: {list(params)}.")
+            setattr(self, f"{key}_", value)
+        return self
+
+    #===========================================================================#
+    # semi-private methods                                                      #
+    #===========================================================================#
+
+    def __crossEntropy(self, X, Y):
+        P = fun.softmax(X @ self.W_ + self.b_)
+        return -np.mean(np.sum(Y * np.log(np.clip(P, 1e-12, 1)), axis=1))
@@ -6,6 +6,9 @@
 # import class definitions
 from pyFiles.BaseClass import BaseClass
 from pyFiles.MetaModels.DataSet import DataSet
+from pyFiles.MetaModels.SharedArrays import SharedArrays, attach
+from pyFiles.MetaModels.Splits import loadSplit, splitCodes, stratifiedFolds
+from pyFiles.Telemetry import Telemetry
 import pyFiles.Functions as fun
 import pyFiles.Input as inp
 
@@ -13,6 +16,7 @@ import pyFiles.Input as inp
 # import external dependencies                                                  #
 #===============================================================================#
 
+from concurrent.futures import ProcessPoolExecutor
 import itertools
 import numpy as np
 import pandas as pd
@@ -23,6 +27,16 @@ import pandas as pd
 
 class MLbase(BaseClass):
 
+    # the split data is rebuilt from data/Simulation.csv, no need to pickle it
+    transientAttributes = BaseClass.transientAttributes + ['data_', 'folds_']
+
+    # hyper-parameter a model can be grown along with warm_start, if any
+    warmStartParameter = None
+
+    # constructor argument that takes the number of outcomes, if the model
+    # can't tell it from a training subset that misses some of them
+    classCountParameter = None
+
     #===========================================================================#
     # constructor                                                               #
     #===========================================================================#
@@ -50,11 +64,67 @@ class MLbase(BaseClass):
     #===========================================================================#
 
     def run(self, **kwargs):
-        # use run from baseclass
-        super().run(**kwargs)
+        """
+        use:
+        evaluates every hyper-parameter combination left in sample_, then
+        builds the best one.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+
+        kwargs:         type:           description:
+        nJobs           int             number of worker processes for the
+                                        grid search, default = 1 (serial)
+        saveEvery       int             save state after this many finished
+                                        grid points, default = 50
+        search          str             'grid' (every combination on the full
+                                        training set), 'halving' (successive
+                                        halving), or 'hyperband'. default =
+                                        'grid'
+        eta             int             halving / hyperband: keep the top
+                                        1/eta of the configurations at each
+                                        rung, default = 3
+        minBudget       float           halving / hyperband: smallest
+                                        fraction of the training set a
+                                        configuration is fit on, default =
+                                        1/27
+        metric          str             validation metric used to rank
+                                        configurations and pick the best one,
+                                        default = 'sum'
+        cv              int             number of stratified folds to cross
+                                        validate each configuration over the
+                                        train and validate rows, default =
+                                        None (fixed split)
+        repeats         int             number of times the folds are
+                                        reshuffled, default = 1
+        (any other kwargs are passed on to BaseClass.run and _buildBestModel)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        nJobs = kwargs.pop('nJobs') if 'nJobs' in kwargs else 1
+        saveEvery = kwargs.pop('saveEvery') if 'saveEvery' in kwargs else 50
+        search = kwargs.pop('search') if 'search' in kwargs else 'grid'
+        cv = kwargs.pop('cv') if 'cv' in kwargs else None
+        repeats = kwargs.pop('repeats') if 'repeats' in kwargs else 1
+        self._getFolds(cv, repeats)
+        if search in ['halving', 'hyperband']:
+            self._runAdaptive(search, nJobs, **kwargs)
+        elif search != 'grid':
+            raise KeyError(f"OOPSIE! search '{search}' isn't implemented.\ntry entries like: 'grid', 'halving', or 'hyperband'.")
+        else:
+            self._runGrid(nJobs, saveEvery, **kwargs)
+        # run only options aren't needed to build the best model
+        for key in ['instrument', 'telemetry', 'telemetryInterval', 'eta', 'minBudget']:
+            if key in kwargs: kwargs.pop(key)
         # once basic run is complete, find the best model from sample and build
-        # it
+        # it, then save again so the pickle has it ( loading won't refit )
         self._buildBestModel(**kwargs)
+        self.saveState()
 
     def performanceAccuracy(self):
         results = {}
@@ -74,23 +144,177 @@ class MLbase(BaseClass):
             results[key] = self.data_[key].recall_[0, self.estIdx_]
         return results
 
+    def factorLimits(self, **kwargs):
+        """
+        use:
+        lower and upper limit of each factor (in DataSet.Xcols_ order): the
+        control factors from inp.controlFactors, the random factors from the
+        range seen in the sim data ( their true limit depends on the escape
+        speed of each scenario ).
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        kwargs:         type:           description:
+        limits          dict            {factor : (low, high)} overrides
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        low             np.ndarray      (D,)
+        high            np.ndarray      (D,)
+        """
+        Xcols = self.data_['train'].Xcols_
+        X = np.vstack([self.data_[key].X() for key in ['train', 'validate', 'test']])
+        limits = {colName:(X[:,idx].min(), X[:,idx].max()) for idx,colName in enumerate(Xcols)}
+        limits.update(inp.controlFactors)
+        if 'limits' in kwargs: limits.update(kwargs['limits'])
+        low = np.array([limits[colName][0] for colName in Xcols], dtype=np.float64)
+        high = np.array([limits[colName][1] for colName in Xcols], dtype=np.float64)
+        return low, high
+
+    def predictGrid(self, toFile=None, **kwargs):
+        """
+        use:
+        outcome probabilities of the current model_ over a dense grid of the
+        factor space (every combination of nPoints values per factor, in
+        row-major order). see _predictChunks for how the work is done.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        toFile          str             .npy file to stream the results to,
+                                        default = 'data/{name}_grid.npy'
+
+        kwargs:         type:           description:
+        nPoints         int / dict      values per factor (a dict can give a
+                                        number per factor), default = 4
+        limits          dict            {factor : (low, high)} overrides, see
+                                        factorLimits
+        (chunkSize, nJobs, telemetry, and telemetryInterval are passed on to
+        _predictChunks)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        columns         list            column names of the saved array
+        """
+        nPoints = kwargs['nPoints'] if 'nPoints' in kwargs else 4
+        Xcols = self.data_['train'].Xcols_
+        if not isinstance(nPoints, dict): nPoints = {colName:nPoints for colName in Xcols}
+        spec = {'mode':'grid', 'nPoints':np.array([nPoints[colName] for colName in Xcols])}
+        nTotal = int(np.prod(spec['nPoints']))
+        toFile = toFile if toFile is not None else f"data/{self.name_}_grid.npy"
+        return self._predictChunks(spec, nTotal, toFile, **kwargs)
+
+    def predictStream(self, nSamples, toFile=None, **kwargs):
+        """
+        use:
+        outcome probabilities of the current model_ for nSamples uniformly
+        random points of the factor space. every chunk draws its points from
+        its own seed, so the results don't depend on nJobs or chunkSize.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        nSamples        int             number of random points
+        toFile          str             .npy file to stream the results to,
+                                        default = 'data/{name}_stream.npy'
+
+        kwargs:         type:           description:
+        seed            int             default = 0
+        limits          dict            see predictGrid
+        (chunkSize, nJobs, telemetry, and telemetryInterval are passed on to
+        _predictChunks)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        columns         list            column names of the saved array
+        """
+        seed = kwargs['seed'] if 'seed' in kwargs else 0
+        spec = {'mode':'random', 'seed':seed}
+        toFile = toFile if toFile is not None else f"data/{self.name_}_stream.npy"
+        return self._predictChunks(spec, int(nSamples), toFile, **kwargs)
+
     #===========================================================================#
     # puplic methods                                                            #
     # required by BaseClass, implemented here                                   #
     # OR                                                                        #
-    # required for MLbase, child needs to implement                             #
+    # defaults for MLbase, child can override                                   #
     #===========================================================================#
 
-    def fit(self, *args, **kwargs):
-        NotImplemented
+    def fit(self):
+        # fit with training data only; override if the model needs more
+        self.model_.fit(self.data_['train'].X(), self.data_['train'].y())
 
-    def predict(self, *args, **kwargs):
-        NotImplemented
+    def predict(self):
+        for key in ['train', 'validate', 'test']:
+            X = self.data_[key].X()
+            yhat = self.model_.predict(X)
+            self.data_[key].update(yhat)
 
     #===========================================================================#
     # semi-protected methods                                                    #
     #===========================================================================#
 
+    def _evaluate(self, tasks, nJobs):
+        """
+        use:
+        fits and scores one model per task, either in this process or on a
+        pool of nJobs workers that memory map the split arrays. results are
+        yielded in task order. when cross validating (folds_), each task is
+        fit once per fold (all folds run concurrently on the pool) and the
+        metric columns hold the mean over the folds, with the standard
+        deviation in '{metric}_std_({cvIdx})' columns.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        tasks           list            (hyper-parameter dict, fraction of the
+                                        training set to fit on, warm start
+                                        ladder or None) tuples
+        nJobs           int             number of worker processes
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        results         generator       list of metric column dicts for each
+                                        task ( one per ladder value )
+        """
+        initargs = (type(self), len(self.colNames_['estimators']), self.estIdx_)
+        arrays = self._splitArrays()
+        if self.folds_ is None:
+            nFolds = 1
+            foldTasks = [task + (None,) for task in tasks]
+        else:
+            arrays['folds'] = self.folds_
+            nFolds = self.folds_.shape[0] * (int(self.folds_.max()) + 1)
+            foldTasks = [task + (fold,) for task in tasks for fold in range(nFolds)]
+
+        if nJobs <= 1:
+            _gridWorkerInit(*initargs, arrays=arrays)
+            results = map(_gridWorkerEvaluate, foldTasks)
+        else:
+            shared = SharedArrays(arrays)
+            chunksize = max(1, len(foldTasks) // (4*nJobs))
+            pool = ProcessPoolExecutor(max_workers=nJobs, initializer=_gridWorkerInit, initargs=initargs + (shared.descriptor_,))
+            results = pool.map(_gridWorkerEvaluate, foldTasks, chunksize=chunksize)
+        try:
+            if nFolds == 1:
+                yield from results
+                return
+            # collect the folds of each task and average them
+            for _ in tasks:
+                yield _foldSummary([next(results) for _ in range(nFolds)])
+        finally:
+            if nJobs > 1:
+                pool.shutdown(cancel_futures=True)
+                shared.close()
+
     def _buildBestModel(self, *args, **kwargs):
         # set variables by key word arguments
         metric = kwargs['metric'] if 'metric' in kwargs else 'sum'
@@ -109,8 +333,22 @@ class MLbase(BaseClass):
             raise KeyError("OOPSIE! you seem to have entered a metric value incorrectly, or have selected a metric that isn't yet implemented.\ntry entries like: 'accuracy', 'precision', 'recall', or 'sum'.")
         # find the row index with the maximum value in the chosen metric column
         sampleRowIdx = self.sample_[metricCol].idxmax()
-        # re-run the best scenario to update all relevant data
-        self._runScenario(sampleRowIdx, **kwargs)
+        # re-fit the best scenario on the fixed split; its metrics go to
+        # separate refit_ columns, the row's own ( possibly cross validated )
+        # metrics are what it was chosen by
+        self._runScenario(sampleRowIdx, columnPrefix="refit_", **kwargs)
+
+    def _getFolds(self, cv, repeats, seed=0):
+        """
+        use:
+        sets folds_, the repeated stratified fold of each train and validate
+        row (train rows first), or None for the fixed split.
+        """
+        if cv is None:
+            self.folds_ = None
+            return
+        y = np.hstack([self.data_['train'].y(), self.data_['validate'].y()])
+        self.folds_ = stratifiedFolds(y, len(self.colNames_['estimators']), cv, repeats, seed)
 
     def _findModelParams(self, sampleRowIdx):
         # get the row from the sample DF
@@ -120,74 +358,64 @@ class MLbase(BaseClass):
         # replace any pandas NaN with native None
         for key,val in params.items():
             if str(val).lower() == 'nan': params[key] = None
-        # add in the number of estimators
-        params['n_estimators'] = len(self.colNames_['estimators'])
-        # enforce data types
-        params['min_samples_leaf'] = int(params['min_samples_leaf'])
+        # enforce data types ( pandas stores the grid as floats )
+        for key,val in params.items():
+            if val is not None and float(val).is_integer(): params[key] = int(val)
         # return model hyperparameters
         return params
 
     def _splitData(self, **kwargs):
-
-        # set variables by key word arguments
-        trainP = kwargs['trainP'] if 'trainP' in kwargs else 0.6
-        valP = kwargs['valP'] if 'valP' in kwargs else 0.2
-        seed = kwargs['seed'] if 'seed' in kwargs else 0
-
-        # collect percentages of how data will be split
-        splitPercentage = {'train':trainP, 'validate':valP, 'test':1-trainP-valP}
-
-        # load generated sim data
-        df = pd.read_csv("data/Simulation.csv")
-
-        # collect the row indicies where the outcome is different
-        idxEst = {colName:df[df[colName]==1].index.values for colName in self.colNames_['estimators']}
-
-        # shuffle all the indicies
-        np.random.seed(seed)
-        for idx in idxEst.values(): np.random.shuffle(idx)
-
-        # collect the number of rows associtated with each estimator outcome
-        nEst = {key:val.size for key,val in idxEst.items()}
-
-        # create empty containers to hold index arrays associated with each dataset
-        idxDs = {key:[] for key in ['train', 'validate', 'test']}
-
-        for colName in self.colNames_['estimators']:
-            # get the number from each estimator being divyied up between datasets
-            Nds = {dsName:int(nEst[colName]*splitPercentage[dsName]) for dsName in ['train', 'validate', 'test']}
-            # slice index arrays from estimates and add them to idxDs collection
-            idxDs['train'] = idxEst[colName][:Nds['train']]
-            idxDs['validate'] = idxEst[colName][Nds['train']:Nds['train']+Nds['validate']]
-            idxDs['test'] = idxEst[colName][Nds['train']+Nds['validate']:]
-
-        # merge list of index arrays for each dataset into single array of indices
-        for dsName,idxList in idxDs.items(): idxDs[dsName] = np.hstack(idxList)
-
-        # make a column that collects the one-hotted estimator columns into a single column of discrete values
-        # df['y'] = df[self.colNames_['estimators']].to_numpy(np.int32).argmax(axis=1)
+        """
+        use:
+        stratified train/validate/test split of data/Simulation.csv. the
+        arrays and split indices are cached by Splits.loadSplit, keyed by
+        the dataset hash, seed, and proportions.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        kwargs:         type:           description:
+        trainP          float           default = 0.6
+        valP            float           default = 0.2
+        seed            int             default = 0
+        """
 
         # collect the Xcols and Ycols
         Xcols = list(inp.controlFactors.keys()) + inp.randomFactors
         Ycols = self.colNames_['estimators']
-        # Ycols = ['y']
 
-        # add dictionary of split data
-        self.data_ = {dsName:DataSet(df.iloc[idx], Xcols, Ycols) for dsName,idx in idxDs.items()}
+        # load the (cached) arrays and the split code of each row
+        X, y, split = loadSplit("data/Simulation.csv", Xcols, Ycols, **kwargs)
+
+        # build the arrays once with the rows grouped by dataset, so each split
+        # is a view of one contiguous block
+        idxDs = {dsName:np.flatnonzero(split == code) for dsName,code in splitCodes.items()}
+        order = np.hstack(list(idxDs.values()))
+        allData = DataSet(X[order], y[order], Xcols, Ycols)
+        self.data_ = {}
+        start = 0
+        for dsName,idx in idxDs.items():
+            self.data_[dsName] = allData.view(start, start+idx.size)
+            start += idx.size
 
     #===========================================================================#
     # semi-protected methods                                                    #
     # required by BaseClass, implented here                                     #
     # OR                                                                        #
-    # required for MLbase, child needs to implement                             #
+    # defaults for MLbase, child can override                                   #
     #===========================================================================#
 
     def _buildModel(self, *args, **kwargs):
-        NotImplemented
+        if self.classCountParameter is not None: kwargs[self.classCountParameter] = len(self.colNames_['estimators'])
+        self.model_ = self._newModel(**kwargs)
 
     def _getParameterMap(self, *args, **kwargs):
         NotImplemented
 
+    @staticmethod
+    def _newModel(*args, **kwargs):
+        NotImplemented
+
     def _getSample(self, **kwargs):
         self.sample_ = pd.DataFrame(
             list(itertools.product(*self.parameterMap_.values())),
@@ -204,9 +432,370 @@ class MLbase(BaseClass):
         self.colNames_['metrics'] = metricCols
         self.colNames_['all'] += metricCols
 
+    def _runGrid(self, nJobs, saveEvery, **kwargs):
+        """
+        use:
+        evaluates every row of sample_ without metrics yet, in this process or
+        on a pool of nJobs workers. the split arrays are shared with the
+        workers once through memory mapped files and each task only carries
+        its hyper-parameters. if the model has a warmStartParameter (eg
+        n_estimators for a forest), rows that only differ in it are one task:
+        a single model is grown through the ladder of values and scored at
+        each one, so the whole ladder costs about as much as its largest
+        value.
+        """
+        telemetry = kwargs['telemetry'] if 'telemetry' in kwargs else 'bar'
+        telemetryInterval = kwargs['telemetryInterval'] if 'telemetryInterval' in kwargs else 1.0
+
+        pending = self.sample_.index[self.sample_['accuracy_(1)'].isna()].values
+        warmParam = self.warmStartParameter
+
+        # group rows into tasks, each group is a list of row indices
+        if warmParam is None:
+            groups = [[rowIdx] for rowIdx in pending]
+        else:
+            groupDict = {}
+            for rowIdx in pending:
+                params = self._findModelParams(rowIdx)
+                params.pop(warmParam)
+                groupDict.setdefault(tuple(sorted(params.items(), key=lambda item: item[0])), []).append(rowIdx)
+            groups = [sorted(rows, key=lambda rowIdx: self._findModelParams(rowIdx)[warmParam]) for rows in groupDict.values()]
+
+        tasks = []
+        for rows in groups:
+            ladder = [self._findModelParams(rowIdx)[warmParam] for rowIdx in rows] if warmParam is not None else None
+            tasks.append((self._findModelParams(rows[0]), 1.0, ladder))
+
+        self.telemetry_ = Telemetry(len(pending), mode=telemetry, interval=telemetryInterval, name=self.name_)
+        nDone = 0
+        for rows,resultsList in zip(groups, self._evaluate(tasks, nJobs)):
+            for rowIdx,results in zip(rows, resultsList):
+                for colName,value in results.items():
+                    self.sample_.loc[rowIdx, colName] = value
+            self.telemetry_.update(scenarios=len(rows), worker='pool')
+            nDone += len(rows)
+            if nDone // saveEvery > (nDone - len(rows)) // saveEvery: self.saveState()
+        self.sampleRowIdx_ = self.sample_.shape[0]
+        self._finishRun()
+
+    def _runAdaptive(self, search, nJobs, **kwargs):
+        """
+        use:
+        successive halving or hyperband over the rows of sample_. every
+        configuration in a bracket is fit on a small fraction of the training
+        set, only the top 1/eta (by validation metric) are promoted to eta
+        times the budget, until the survivors are fit on the full training
+        set. only full budget results are written to the metric columns, so
+        _buildBestModel only chooses between them; every row also gets the
+        'budget' and 'score' of the last rung it reached.
+        """
+        eta = kwargs['eta'] if 'eta' in kwargs else 3
+        minBudget = kwargs['minBudget'] if 'minBudget' in kwargs else 1/27
+        metric = kwargs['metric'] if 'metric' in kwargs else 'sum'
+        telemetry = kwargs['telemetry'] if 'telemetry' in kwargs else 'bar'
+        telemetryInterval = kwargs['telemetryInterval'] if 'telemetryInterval' in kwargs else 1.0
+        seed = kwargs['seed'] if 'seed' in kwargs else 0
+
+        # number of rungs between the smallest budget and the full training set
+        sMax = int(np.floor(np.log(1/minBudget) / np.log(eta) + 1e-9))
+        rowIdxs = np.arange(self.sample_.shape[0])
+
+        # brackets: (rows, starting rung); halving is the most aggressive
+        # hyperband bracket run over every row
+        if search == 'halving':
+            brackets = [(rowIdxs, sMax)]
+        else:
+            rng = np.random.RandomState(seed)
+            brackets = []
+            for s in range(sMax, -1, -1):
+                n = int(np.ceil((sMax + 1) / (s + 1) * eta**s))
+                brackets.append((rng.choice(rowIdxs, size=min(n, rowIdxs.size), replace=False), s))
+
+        # count fits for the progress report
+        nFits = 0
+        for rows,s in brackets:
+            n = rows.size
+            for _ in range(s + 1):
+                nFits += n
+                n = max(int(n // eta), 1)
+        self.telemetry_ = Telemetry(nFits, mode=telemetry, interval=telemetryInterval, name=self.name_)
+
+        for colName in ['budget', 'score']:
+            if colName not in self.sample_: self.sample_[colName] = np.nan
+        for rows,s in brackets:
+            for rung in range(s + 1):
+                fraction = float(eta) ** (rung - s)
+                tasks = [(self._findModelParams(rowIdx), fraction, None) for rowIdx in rows]
+                scores = []
+                for rowIdx,(results,) in zip(rows, self._evaluate(tasks, nJobs)):
+                    score = _rankScore(results, metric)
+                    scores.append(score)
+                    # a row can show up in more than one hyperband bracket, keep
+                    # its largest budget
+                    if not self.sample_.loc[rowIdx, 'budget'] > fraction:
+                        self.sample_.loc[rowIdx, ['budget', 'score']] = [fraction, score]
+                        if fraction == 1:
+                            for colName,value in results.items():
+                                self.sample_.loc[rowIdx, colName] = value
+                    self.telemetry_.update(scenarios=1, worker='pool')
+                # promote the top 1/eta
+                nKeep = max(int(rows.size // eta), 1)
+                rows = rows[np.argsort(scores, kind='stable')[::-1][:nKeep]]
+
+        self.sampleRowIdx_ = self.sample_.shape[0]
+        self._finishRun()
+
+    def _finishRun(self):
+        self.telemetry_.close()
+        self.runComplete_ = True
+        self.saveState()
+        fun.printHeader(f"finished {self.name_} scenarios!", verbose=True)
+        self.sample_.to_csv(f"data/{self.name_}.csv", index=False)
+
     def _runScenario(self, *args, **kwargs):
-        NotImplemented
+
+        if len(args) == 0:
+            sampleRowIdx = self.sampleRowIdx_
+        if len(args) == 1:
+            sampleRowIdx = args[0]
+        columnPrefix = kwargs['columnPrefix'] if 'columnPrefix' in kwargs else ""
+
+        # model hyperpareters from sample
+        params = self._findModelParams(sampleRowIdx)
+
+        # construct model
+        self._buildModel(**params)
+
+        # train model with training data
+        self.fit()
+
+        # make predicitons on all data sets
+        self.predict()
+
+        # calculate the accuracies, precision, and recall
+        accuracy = self.performanceAccuracy()
+        precision = self.performancePrecision()
+        recall = self.performanceRecall()
+
+        # record accuracy (and another other desired metric) for both train and
+        # validate sets
+        for metricName, metricDict in zip(['accuracy', 'precision', 'recall'], [accuracy, precision, recall]):
+            for cvIdx, key in enumerate(['train', 'validate', 'test']):
+                colName = f"{columnPrefix}{metricName}_({cvIdx})"
+                try:
+                    self.sample_.loc[sampleRowIdx, colName] = metricDict[key]
+                except Exception as error:
+                    # no debugger prompt, this may be running in a worker
+                    raise KeyError(f"OOPSIE! couldn't record {colName} for row {sampleRowIdx} of {self.name_}: {error}") from error
+
+    def _predictChunks(self, spec, nTotal, toFile, **kwargs):
+        """
+        use:
+        generates candidate initial conditions chunk by chunk, predicts their
+        outcome probabilities, and writes each chunk straight into a
+        preallocated .npy file (float32 factors followed by one probability
+        column per outcome). workers build their own chunks from (start, stop)
+        and write to the file themselves, so memory stays bounded by
+        chunkSize no matter how many points there are.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        kwargs:         type:           description:
+        chunkSize       int             points per chunk, default = 2**16
+        nJobs           int             number of worker processes, default = 1
+        limits          dict            see predictGrid
+        telemetry       str             default = 'bar'
+        telemetryInterval float         default = 1.0
+        """
+        chunkSize = kwargs['chunkSize'] if 'chunkSize' in kwargs else 2**16
+        nJobs = kwargs['nJobs'] if 'nJobs' in kwargs else 1
+        telemetry = kwargs['telemetry'] if 'telemetry' in kwargs else 'bar'
+        telemetryInterval = kwargs['telemetryInterval'] if 'telemetryInterval' in kwargs else 1.0
+
+        Xcols = self.data_['train'].Xcols_
+        spec['low'], spec['high'] = self.factorLimits(**kwargs)
+        spec['K'] = len(self.colNames_['estimators'])
+
+        # rebuild the best model if this instance was loaded from a saved state
+        if not hasattr(self, 'model_'): self._buildBestModel()
+
+        columns = Xcols + [f"P_{colName}" for colName in self.colNames_['estimators']]
+        out = np.lib.format.open_memmap(toFile, mode='w+', dtype=np.float32, shape=(nTotal, len(columns)))
+        del out
+
+        chunks = [(start, min(start+chunkSize, nTotal)) for start in range(0, nTotal, chunkSize)]
+        initargs = (self.model_, spec, toFile)
+        self.telemetry_ = Telemetry(nTotal, mode=telemetry, interval=telemetryInterval, name=f"{self.name_} predict")
+        if nJobs <= 1:
+            _predictWorkerInit(*initargs)
+            for chunk in chunks: self.telemetry_.update(scenarios=_predictWorkerChunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=nJobs, initializer=_predictWorkerInit, initargs=initargs) as pool:
+                for nDone in pool.map(_predictWorkerChunk, chunks):
+                    self.telemetry_.update(scenarios=nDone, worker='pool')
+        self.telemetry_.close()
+        fun.printHeader(f"saved {nTotal} predictions to {toFile}", verbose=True)
+        return columns
+
+    def _splitArrays(self):
+        """
+        use:
+        the train, validate, and test features and labels as a flat
+        dictionary of arrays: {'X_(0)', 'y_(0)', 'X_(1)', ...}
+        """
+        arrays = {}
+        for cvIdx,key in enumerate(['train', 'validate', 'test']):
+            arrays[f"X_({cvIdx})"] = self.data_[key].X()
+            arrays[f"y_({cvIdx})"] = self.data_[key].y()
+        return arrays
 
     #===========================================================================#
     # semi-private                                                              #
     #===========================================================================#
+
+#===============================================================================#
+# grid search workers                                                           #
+#===============================================================================#
+
+# state of a grid search worker process, set once by _gridWorkerInit
+_worker = {}
+
+def _gridWorkerInit(modelClass, K, estIdx, descriptor=None, arrays=None):
+    # only what is needed to build and score models is sent to the worker;
+    # the arrays are memory mapped, not pickled
+    _worker['newModel'] = modelClass._newModel
+    if modelClass.classCountParameter is not None:
+        _worker['newModel'] = lambda **params: modelClass._newModel(**params, **{modelClass.classCountParameter: K})
+    _worker['warmParam'] = modelClass.warmStartParameter
+    _worker['K'] = K
+    _worker['estIdx'] = estIdx
+    _worker['arrays'] = arrays if arrays is not None else attach(descriptor)
+    # fixed order of training rows, so a budget fraction always means the same
+    # (nested) subset of the training set
+    _worker['trainOrder'] = np.random.RandomState(0).permutation(_worker['arrays']['y_(0)'].size)
+    if 'folds' in _worker['arrays']:
+        # cross validation folds are drawn from the train and validate rows
+        arrays = _worker['arrays']
+        _worker['Xcv'] = np.vstack([arrays['X_(0)'], arrays['X_(1)']])
+        _worker['ycv'] = np.hstack([arrays['y_(0)'], arrays['y_(1)']])
+        _worker['nFolds'] = int(arrays['folds'].max()) + 1
+
+def _foldArrays(fold):
+    # split arrays for one cross validation fold: the fold is validated on and
+    # the other folds are trained on, the test set is unchanged
+    repeat, k = divmod(fold, _worker['nFolds'])
+    isVal = _worker['arrays']['folds'][repeat] == k
+    arrays = dict(_worker['arrays'])
+    arrays['X_(0)'], arrays['y_(0)'] = _worker['Xcv'][~isVal], _worker['ycv'][~isVal]
+    arrays['X_(1)'], arrays['y_(1)'] = _worker['Xcv'][isVal], _worker['ycv'][isVal]
+    return arrays
+
+def _foldSummary(foldResults):
+    # mean and standard deviation over folds, for each ladder value
+    resultsList = []
+    for ladderResults in zip(*foldResults):
+        results = {}
+        for colName in ladderResults[0]:
+            values = [foldResult[colName] for foldResult in ladderResults]
+            metric, cvIdx = colName.split('_')
+            results[colName] = np.mean(values)
+            results[f"{metric}_std_{cvIdx}"] = np.std(values)
+        resultsList.append(results)
+    return resultsList
+
+def _gridWorkerEvaluate(task):
+    params, fraction, ladder, fold = task
+    arrays = _worker['arrays'] if fold is None else _foldArrays(fold)
+    if fraction < 1:
+        nTrain = max(int(round(fraction * arrays['y_(0)'].size)), 2*_worker['K'])
+        order = _worker['trainOrder'] if fold is None else np.random.RandomState(0).permutation(arrays['y_(0)'].size)
+        rows = np.sort(order[:nTrain])
+        X, y = arrays['X_(0)'][rows], arrays['y_(0)'][rows]
+    else:
+        X, y = arrays['X_(0)'], arrays['y_(0)']
+    if ladder is None:
+        model = _worker['newModel'](**params)
+        model.fit(X, y)
+        return _scoreModels([model], arrays, _worker['K'], _worker['estIdx'])
+    # grow one model through the ladder, only the new part is fit each time;
+    # the predictions at every checkpoint are scored together at the end
+    model = _worker['newModel'](**params, warm_start=True)
+    yhats = {cvIdx:[] for cvIdx in range(3)}
+    for value in ladder:
+        model.set_params(**{_worker['warmParam']: value})
+        model.fit(X, y)
+        for cvIdx in range(3): yhats[cvIdx].append(model.predict(arrays[f"X_({cvIdx})"]))
+    return _scorePredictions(yhats, arrays, _worker['K'], _worker['estIdx'])
+
+#===============================================================================#
+# prediction workers                                                            #
+#===============================================================================#
+
+# state of a prediction worker process, set once by _predictWorkerInit
+_predictor = {}
+
+def _predictWorkerInit(model, spec, toFile):
+    _predictor['model'] = model
+    _predictor['spec'] = spec
+    _predictor['toFile'] = toFile
+
+def _candidates(spec, start, stop):
+    """
+    candidate factors for rows start:stop of a grid or random sample.
+    """
+    D = spec['low'].size
+    if spec['mode'] == 'grid':
+        # unravel the flat row numbers into an index per factor
+        idx = np.array(np.unravel_index(np.arange(start, stop), spec['nPoints'])).T
+        step = (spec['high'] - spec['low']) / np.maximum(spec['nPoints'] - 1, 1)
+        return spec['low'] + idx * step
+    # random chunks are seeded by their start row
+    rng = np.random.RandomState([spec['seed'], start])
+    return spec['low'] + rng.random_sample((stop-start, D)) * (spec['high'] - spec['low'])
+
+def _predictWorkerChunk(chunk):
+    start, stop = chunk
+    spec = _predictor['spec']
+    model = _predictor['model']
+    X = _candidates(spec, start, stop)
+    # models only know the classes they were trained on
+    P = np.zeros((X.shape[0], spec['K']))
+    P[:, np.asarray(model.classes_, dtype=int)] = model.predict_proba(X)
+    out = np.load(_predictor['toFile'], mmap_mode='r+')
+    out[start:stop, :X.shape[1]] = X
+    out[start:stop, X.shape[1]:] = P
+    out.flush()
+    return stop - start
+
+def _rankScore(results, metric):
+    """
+    validation score used to rank configurations, same choices as
+    _buildBestModel.
+    """
+    if metric == 'sum':
+        return sum([results[f"{x}_(1)"] for x in ['accuracy', 'precision', 'recall']])
+    return results[f"{metric}_(1)"]
+
+def _scoreModels(models, arrays, K, estIdx):
+    """
+    accuracy, precision, and recall (for estimator column estIdx) of each
+    fitted model on each split, keyed by the sample_ metric column names.
+    """
+    yhats = {cvIdx:[model.predict(arrays[f"X_({cvIdx})"]) for model in models] for cvIdx in range(3)}
+    return _scorePredictions(yhats, arrays, K, estIdx)
+
+def _scorePredictions(yhats, arrays, K, estIdx):
+    """
+    same as _scoreModels, from the predicted labels {cvIdx : [yhat of each
+    model]}. the confusion matrices of all the models are counted at once.
+    """
+    resultsList = [{} for _ in yhats[0]]
+    for cvIdx in range(3):
+        CMs = fun.confusionMatrices(arrays[f"y_({cvIdx})"], np.vstack(yhats[cvIdx]), K=K)
+        metrics = fun.batchMetrics(CMs)
+        for results,accuracy,precision,recall in zip(resultsList, metrics['accuracy'], metrics['precision'], metrics['recall']):
+            results[f"accuracy_({cvIdx})"] = accuracy
+            results[f"precision_({cvIdx})"] = precision[estIdx]
+            results[f"recall_({cvIdx})"] = recall[estIdx]
+    return resultsList
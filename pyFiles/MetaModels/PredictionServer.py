@@ -0,0 +1,281 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+from pyFiles.MetaModels.FlatForest import FlatForest
+import pyFiles.Functions as fun
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import asyncio
+from collections import OrderedDict, deque
+import json
+import numpy as np
+import os
+from time import perf_counter
+
+#===============================================================================#
+# PredictionServer definition                                                   #
+#===============================================================================#
+
+class PredictionServer:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, predictor, low, high, Ycols, **kwargs):
+        """
+        use:
+        long running local HTTP server for surrogate queries. the model is
+        loaded once; single point requests that arrive together are coalesced
+        into one predict_proba call (micro-batch), and answers are kept in an
+        LRU cache keyed on the factor vector quantized to a fraction of each
+        factor's range.
+
+        endpoints:
+            POST /predict   {"x": [factors]} or {"X": [[factors], ...]}
+                            -> {"p": [...]} or {"P": [[...], ...]}, one
+                            probability per outcome in Ycols order
+            GET /stats      request count, cache hits, batch sizes, and
+                            latency percentiles (ms)
+            GET /health     {"ok": true}
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        predictor       object          fitted model with predict_proba and
+                                        classes_ (eg FlatForest)
+        low             np.ndarray      (D,) lower limit of each factor
+        high            np.ndarray      (D,) upper limit of each factor
+        Ycols           list            outcome names
+
+        kwargs:         type:           description:
+        window          float           longest time (s) a batch waits for
+                                        more requests, default = 2e-3
+        maxBatch        int             largest micro-batch, default = 1024
+        cacheSize       int             LRU cache entries, default = 2**16
+        quantum         float           cache resolution as a fraction of each
+                                        factor's range, default = 1e-4
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        self.predictor_ = predictor
+        self.Ycols_ = Ycols
+        self.window_ = kwargs['window'] if 'window' in kwargs else 2e-3
+        self.maxBatch_ = kwargs['maxBatch'] if 'maxBatch' in kwargs else 1024
+        self.cacheSize_ = kwargs['cacheSize'] if 'cacheSize' in kwargs else 2**16
+        quantum = kwargs['quantum'] if 'quantum' in kwargs else 1e-4
+
+        self.low_ = np.asarray(low, dtype=np.float64)
+        self.step_ = np.where(high > low, (np.asarray(high) - low) * quantum, quantum)
+        self.classes_ = np.asarray(predictor.classes_, dtype=int)
+
+        self.cache_ = OrderedDict()
+        self.latency_ = deque(maxlen=10000)
+        self.stats_ = {'requests':0, 'points':0, 'cacheHits':0, 'batches':0, 'batchedPoints':0}
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def serve(self, **kwargs):
+        """
+        use:
+        runs the server until interrupted.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        kwargs:         type:           description:
+        port            int             localhost TCP port, default = 8765
+        socket          str             Unix socket path; used instead of the
+                                        port if given, default = None
+        verbose         bool            flag to print, default = False
+        """
+        try:
+            asyncio.run(self.__main(**kwargs))
+        except KeyboardInterrupt:
+            pass
+
+    def predict(self, X):
+        """
+        use:
+        outcome probabilities for a batch of points, one column per outcome
+        in Ycols (outcomes the model never saw get 0).
+        """
+        P = np.zeros((X.shape[0], len(self.Ycols_)))
+        P[:, self.classes_] = self.predictor_.predict_proba(X)
+        return P
+
+    def statistics(self):
+        latency = np.array(self.latency_) * 1e3
+        stats = dict(self.stats_)
+        stats['meanBatch'] = stats['batchedPoints'] / max(stats['batches'], 1)
+        for q in [50, 90, 99]:
+            stats[f"p{q}_ms"] = float(np.percentile(latency, q)) if latency.size > 0 else None
+        return stats
+
+    #===========================================================================#
+    # semi-private methods                                                      #
+    #===========================================================================#
+
+    async def __main(self, **kwargs):
+        port = kwargs['port'] if 'port' in kwargs else 8765
+        socket = kwargs['socket'] if 'socket' in kwargs else None
+
+        self.queue_ = asyncio.Queue()
+        batcher = asyncio.create_task(self.__batcher())
+        if socket is not None:
+            if os.path.exists(socket): os.remove(socket)
+            server = await asyncio.start_unix_server(self.__handle, path=socket)
+            address = socket
+        else:
+            server = await asyncio.start_server(self.__handle, host="127.0.0.1", port=port)
+            address = f"http://127.0.0.1:{port}"
+        fun.printHeader(f"serving {', '.join(self.Ycols_)} predictions on {address}", verbose=kwargs['verbose'] if 'verbose' in kwargs else False)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+    async def __batcher(self):
+        # a batch starts with the first waiting point, then takes everything
+        # that arrives while other requests keep coming in, up to window
+        # seconds; a lone request doesn't wait at all
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue_.get()]
+            deadline = loop.time() + self.window_
+            while len(items) < self.maxBatch_ and loop.time() < deadline:
+                nBefore = len(items)
+                await asyncio.sleep(0)
+                while not self.queue_.empty() and len(items) < self.maxBatch_:
+                    items.append(self.queue_.get_nowait())
+                if len(items) == nBefore: break
+            # a failed batch fails its requests, not the batcher
+            try:
+                P = self.predict(np.array([x for x,_ in items]))
+            except Exception as error:
+                for _,future in items:
+                    if not future.done(): future.set_exception(error)
+                continue
+            self.stats_['batches'] += 1
+            self.stats_['batchedPoints'] += len(items)
+            for (_,future),p in zip(items, P):
+                if not future.done(): future.set_result(p)
+
+    async def __handle(self, reader, writer):
+        # minimal HTTP/1.1 with keep-alive, enough for local tools and curl
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine: break
+                method, path = requestLine.decode().split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in [b"\r\n", b"\n", b""]: break
+                    key, value = line.decode().split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                t0 = perf_counter()
+                status, payload = await self.__route(method, path, body)
+                if path == "/predict": self.latency_.append(perf_counter() - t0)
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close': break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def __predictPoints(self, X):
+        # answer from the cache where possible, queue the rest for the batcher
+        keys = [key.tobytes() for key in np.round((X - self.low_) / self.step_).astype(np.int64)]
+        P = [None] * len(keys)
+        waiting = []
+        loop = asyncio.get_running_loop()
+        for idx,key in enumerate(keys):
+            if key in self.cache_:
+                self.cache_.move_to_end(key)
+                P[idx] = self.cache_[key]
+                self.stats_['cacheHits'] += 1
+            else:
+                future = loop.create_future()
+                self.queue_.put_nowait((X[idx], future))
+                waiting.append((idx, future))
+        # wait on all of them, so a failed batch doesn't leave any unread
+        answers = await asyncio.gather(*[future for _,future in waiting], return_exceptions=True)
+        for answer in answers:
+            if isinstance(answer, Exception): raise answer
+        for (idx,_),answer in zip(waiting, answers):
+            P[idx] = answer
+            self.cache_[keys[idx]] = answer
+        while len(self.cache_) > self.cacheSize_: self.cache_.popitem(last=False)
+        self.stats_['points'] += len(keys)
+        return [p.tolist() for p in P]
+
+    async def __route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return "200 OK", {'ok':True}
+        if method == "GET" and path == "/stats":
+            return "200 OK", self.statistics()
+        if method == "POST" and path == "/predict":
+            self.stats_['requests'] += 1
+            try:
+                request = json.loads(body)
+                single = 'x' in request
+                X = np.atleast_2d(np.asarray(request['x'] if single else request['X'], dtype=np.float64))
+                if X.shape[1] != self.low_.size: raise ValueError(f"expected {self.low_.size} factors, got {X.shape[1]}")
+                # json.loads accepts NaN and Infinity
+                if not np.isfinite(X).all(): raise ValueError("factors have to be finite numbers")
+            except (KeyError, ValueError, TypeError) as error:
+                return "400 Bad Request", {'error':f"OOPSIE! {error}"}
+            try:
+                P = await self.__predictPoints(X)
+            except Exception as error:
+                return "500 Internal Server Error", {'error':f"OOPSIE! prediction failed: {error}"}
+            return "200 OK", {'p':P[0]} if single else {'P':P}
+        return "404 Not Found", {'error':f"OOPSIE! no {method} {path}.\ntry: POST /predict, GET /stats, or GET /health."}
+
+#===============================================================================#
+# launcher                                                                      #
+#===============================================================================#
+
+def serveModel(model, **kwargs):
+    """
+    use:
+    serves the best model of a trained MLbase instance (eg RandomForests()).
+    a forest exported with exportFlat is served from its memory mapped node
+    arrays, anything else through model_.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    model           MLbase          trained surrogate instance
+
+    kwargs:         type:           description:
+    (window, maxBatch, cacheSize, and quantum are passed on to
+    PredictionServer; port, socket, and verbose to PredictionServer.serve)
+    """
+    flatDir = f"data/{model.name_}_flat"
+    if os.path.isdir(flatDir):
+        predictor = FlatForest(flatDir)
+    else:
+        if not hasattr(model, 'model_'): model._buildBestModel()
+        predictor = model.model_
+    low, high = model.factorLimits()
+    serverKwargs = {key:kwargs[key] for key in ['window', 'maxBatch', 'cacheSize', 'quantum'] if key in kwargs}
+    serveKwargs = {key:kwargs[key] for key in ['port', 'socket', 'verbose'] if key in kwargs}
+    PredictionServer(predictor, low, high, model.colNames_['estimators'], **serverKwargs).serve(**serveKwargs)
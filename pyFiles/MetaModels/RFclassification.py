@@ -4,13 +4,13 @@
 #===============================================================================#
 
 from sklearn.ensemble import RandomForestClassifier
-import ipdb
 
 #===============================================================================#
 # import internal dependencies                                                  #
 #===============================================================================#
 
 # from pyFiles.BaseClass import BaseClass
+from pyFiles.MetaModels.FlatForest import exportForest
 from pyFiles.MetaModels.MLbase import MLbase
 import pyFiles.Input as inp
 
@@ -20,6 +20,9 @@ import pyFiles.Input as inp
 
 class RandomForests(MLbase):
 
+    # forests can be grown tree by tree along the n_estimators axis
+    warmStartParameter = 'n_estimators'
+
     #===========================================================================#
     # constructor                                                               #
     #===========================================================================#
@@ -31,20 +34,26 @@ class RandomForests(MLbase):
     # puplic methods                                                            #
     #===========================================================================#
 
-    #===========================================================================#
-    # public methods                                                            #
-    # required by MLbase OR BaseClass                                           #
-    #===========================================================================#
-
-    def fit(self):
-        # fit with training data only
-        self.model_.fit(self.data_['train'].X(), self.data_['train'].y())
+    def exportFlat(self, toDir=None):
+        """
+        use:
+        flattens the current (best) forest into node arrays, see
+        FlatForest.exportForest. load them with FlatForest(toDir) for fast
+        single point and batch predictions without sklearn.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        toDir           str             default = 'data/{name}_flat'
+        """
+        toDir = toDir if toDir is not None else f"data/{self.name_}_flat"
+        exportForest(self.model_, toDir)
 
-    def predict(self):
-        for key in ['train', 'validate', 'test']:
-            X = self.data_[key].X()
-            yhat = self.model_.predict(X)
-            self.data_[key].update(yhat)
+    def run(self, **kwargs):
+        # find and build the best forest, then export it
+        super().run(**kwargs)
+        self.exportFlat()
 
     #===========================================================================#
     # semp-protected methods                                                    #
@@ -55,49 +64,16 @@ class RandomForests(MLbase):
     # required by MLbase OR BaseClass                                           #
     #===========================================================================#
 
-    def _buildModel(self, **kwargs):
+    @staticmethod
+    def _newModel(**kwargs):
         """
         https://scikit-learn.org/stable/modules/generated/sklearn.ensemble.RandomForestClassifier.html
         """
-        self.model_ = RandomForestClassifier(**kwargs)
+        return RandomForestClassifier(**kwargs)
 
     def _getParameterMap(self, **kwargs):
         self.parameterMap_ = inp.RFclassifierParameterMap
 
-    def _runScenario(self, *args):
-
-        if len(args) == 0:
-            sampleRowIdx = self.sampleRowIdx_
-        if len(args) == 1:
-            sampleRowIdx = args[0]
-
-        # model hyperpareters from sample
-        params = self._findModelParams(sampleRowIdx)
-
-        # construct model
-        self._buildModel(**params)
-
-        # train model with training data
-        self.fit()
-
-        # make predicitons on all data sets
-        self.predict()
-
-        # calculate the accuracies, precision, and recall
-        accuracy = self.performanceAccuracy()
-        precision = self.performancePrecision()
-        recall = self.performanceRecall()
-
-        # record accuracy (and another other desired metric) for both train and
-        # validate sets
-        for metricName, metricDict in zip(['accuracy', 'precision', 'recall'], [accuracy, precision, recall]):
-            for cvIdx, key in enumerate(['train', 'validate', 'test']):
-                colName = f"{metricName}_({cvIdx})"
-                try:
-                    self.sample_.loc[self.sampleRowIdx_, colName] = metricDict[key]
-                except:
-                    ipdb.set_trace()
-
     #===========================================================================#
     # semi-private methods                                                      #
     #===========================================================================#
@@ -0,0 +1,80 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import numpy as np
+import os
+import shutil
+import tempfile
+
+#===============================================================================#
+# SharedArrays definition                                                       #
+#===============================================================================#
+
+class SharedArrays:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, arrays):
+        """
+        use:
+        writes a dictionary of numpy arrays to .npy files once (in /dev/shm
+        when available), so worker processes can memory map them read-only
+        instead of receiving a pickled copy with every task. every worker
+        shares the same pages. the owner must call close() when the workers
+        are done.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        arrays          dict            {key : np.ndarray}
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self.dir_ = tempfile.mkdtemp(prefix="StarDased_", dir=root)
+        self.descriptor_ = {}
+        for key,array in arrays.items():
+            toFile = os.path.join(self.dir_, f"{key}.npy")
+            np.save(toFile, np.ascontiguousarray(array))
+            self.descriptor_[key] = toFile
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def close(self):
+        shutil.rmtree(self.dir_, ignore_errors=True)
+
+#===============================================================================#
+# worker side                                                                   #
+#===============================================================================#
+
+def attach(descriptor):
+    """
+    use:
+    memory maps the arrays described by SharedArrays.descriptor_.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    descriptor      dict            {key : .npy file name}
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    arrays          dict            {key : read-only np.memmap}
+    """
+    return {key:np.load(fromFile, mmap_mode='r') for key,fromFile in descriptor.items()}
@@ -0,0 +1,169 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import hashlib
+import numpy as np
+import os
+import pandas as pd
+
+#===============================================================================#
+# split manager                                                                 #
+#===============================================================================#
+
+# split codes stored for each row
+splitCodes = {'train':0, 'validate':1, 'test':2}
+
+# rows that aren't training data, by column and value; part of the cache key so
+# arrays cached under other filters are never reused
+excludedRows = {
+    # outcomes predicted by triage instead of simulated
+    'source'    : 'predicted',
+    # runs cut short by a step or wall clock budget have no outcome
+    'truncated' : 1,
+    # a coarse multi-fidelity result is superseded by its fine re-run
+    'refined'   : 1,
+}
+
+def datasetHash(fromFile, *args):
+    """
+    use:
+    short content hash of a data file, plus anything else (eg column names)
+    the cached arrays depend on. reading the raw bytes is much cheaper than
+    parsing the csv.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    fromFile        str             file name of the data
+    *args           str             extra strings to mix into the hash
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    hash            str             16 hex characters
+    """
+    md5 = hashlib.md5()
+    with open(fromFile, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""): md5.update(block)
+    for arg in args: md5.update(str(arg).encode())
+    return md5.hexdigest()[:16]
+
+def loadSplit(fromFile, Xcols, Ycols, **kwargs):
+    """
+    use:
+    factor matrix, integer labels, and stratified split codes for a data
+    file, without the rows in excludedRows. the arrays are built once per
+    dataset hash (row filters included) and the split once per
+    (dataset hash, seed, proportions); both are kept as .npy files in
+    cacheDir and memory mapped read-only afterwards, so every surrogate model
+    starts up without re-parsing or re-splitting the data.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    fromFile        str             csv file name of the sim data
+    Xcols           list            factor column names
+    Ycols           list            one-hot estimator column names
+
+    kwargs:         type:           description:
+    trainP          float           proportion of each outcome in the training
+                                    set, default = 0.6
+    valP            float           proportion of each outcome in the
+                                    validation set, default = 0.2
+    seed            int             seed for shuffling, default = 0
+    cacheDir        str             where the .npy files are kept, default =
+                                    'data/cache'
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    X               np.ndarray      (N,D) factors
+    y               np.ndarray      (N,) integer labels (index into Ycols)
+    split           np.ndarray      (N,) split code of each row, see
+                                    splitCodes
+    """
+
+    # set variables by key word arguments
+    trainP = kwargs['trainP'] if 'trainP' in kwargs else 0.6
+    valP = kwargs['valP'] if 'valP' in kwargs else 0.2
+    seed = kwargs['seed'] if 'seed' in kwargs else 0
+    cacheDir = kwargs['cacheDir'] if 'cacheDir' in kwargs else "data/cache"
+
+    os.makedirs(cacheDir, exist_ok=True)
+    key = datasetHash(fromFile, *Xcols, *Ycols, excludedRows)
+    files = {name:os.path.join(cacheDir, f"{key}_{name}.npy") for name in ['X', 'y']}
+    files['split'] = os.path.join(cacheDir, f"{key}_split_{seed}_{trainP:g}_{valP:g}.npy")
+
+    # parse the csv only if this dataset hasn't been seen yet
+    if not all([os.path.isfile(files[name]) for name in ['X', 'y']]):
+        df = pd.read_csv(fromFile)
+        for colName, value in excludedRows.items():
+            if colName in df: df = df[df[colName] != value]
+        _save(files['X'], df[Xcols].to_numpy(np.float64))
+        _save(files['y'], df[Ycols].to_numpy().argmax(axis=1))
+
+    y = np.load(files['y'], mmap_mode='r')
+    if not os.path.isfile(files['split']):
+        _save(files['split'], stratifiedSplit(y, len(Ycols), trainP, valP, seed))
+
+    return np.load(files['X'], mmap_mode='r'), y, np.load(files['split'], mmap_mode='r')
+
+def stratifiedSplit(y, K, trainP, valP, seed):
+    """
+    use:
+    assigns the rows of each outcome to train, validate, and test in the given
+    proportions, after shuffling them.
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    split           np.ndarray      (N,) split code of each row, see
+                                    splitCodes
+    """
+    rng = np.random.RandomState(seed)
+    split = np.full(y.size, splitCodes['test'], dtype=np.int8)
+    for k in range(K):
+        idx = np.flatnonzero(y == k)
+        rng.shuffle(idx)
+        nTrain = int(idx.size*trainP)
+        nVal = int(idx.size*valP)
+        split[idx[:nTrain]] = splitCodes['train']
+        split[idx[nTrain:nTrain+nVal]] = splitCodes['validate']
+    return split
+
+def stratifiedFolds(y, K, nFolds, nRepeats, seed):
+    """
+    use:
+    repeated stratified k-fold assignment; in every repeat the rows of each
+    outcome are shuffled and dealt out to the folds in turn, so each fold has
+    (almost) the same outcome proportions.
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    folds           np.ndarray      (nRepeats,N) fold of each row in each
+                                    repeat
+    """
+    rng = np.random.RandomState(seed)
+    folds = np.empty((nRepeats, y.size), dtype=np.int8)
+    for repeat in range(nRepeats):
+        for k in range(K):
+            idx = np.flatnonzero(y == k)
+            rng.shuffle(idx)
+            folds[repeat, idx] = (np.arange(idx.size) + repeat) % nFolds
+    return folds
+
+def _save(toFile, array):
+    # write to a temporary name first so a concurrent reader never maps a
+    # half-written file
+    tmpFile = f"{toFile}.{os.getpid()}.tmp.npy"
+    np.save(tmpFile, np.ascontiguousarray(array))
+    os.replace(tmpFile, toFile)
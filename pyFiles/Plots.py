@@ -122,9 +122,9 @@ def scenarioAnimation( sampleRowIdx=0, timeIdx=0, **kwargs ):
 
         valuesDict = sim.setupScenario(sampleRowIdx)
         dt = valuesDict['dt']
-        maxT = inp.maxT
         time = 0
-        while time < maxT:
+        # the step count decides the time limit, see Simulation.runScenario
+        while not timeLimit:
         # for _ in tqdm(range(10)):
 
             valuesDict = sim.runScenario(valuesDict)
@@ -133,11 +133,11 @@ def scenarioAnimation( sampleRowIdx=0, timeIdx=0, **kwargs ):
             timeLimit = valuesDict['timeLimit']
             if earlyStop and any([collision, ejection, timeLimit]): break
 
-            x_i3 = valuesDict['x_i3_t']
+            x_i3 = valuesDict['x_i3_t'] * inp.nbodyL # AU
             m_i1 = valuesDict['m_i1']
             r_i1 = valuesDict['r_i1']
             c_i1 = fun.stellarColorLookup(m_i1)
-            time = valuesDict['time']
+            time = valuesDict['time'] * inp.nbodyT # s
             xmax = x_i3.max()*1.1
             yield x_i3, m_i1, r_i1, c_i1, time, xmax
 
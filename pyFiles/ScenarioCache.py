@@ -0,0 +1,73 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import hashlib
+import json
+import numpy as np
+import os
+
+#===============================================================================#
+# scenario result cache                                                         #
+#===============================================================================#
+
+# bump when the recorded results change meaning, so old entries stop matching
+cacheVersion = 1
+
+def scenarioKey(arrays, settings):
+    """
+    use:
+    content address of a scenario: a hash of its resolved initial conditions
+    and of every setting that changes its outcome. two scenarios with the
+    same key would integrate to the same result.
+
+    ============================================================================
+    input:          type:           description:
+    ============================================================================
+    args:           type:           description:
+    arrays          list            np.ndarrays of initial conditions (eg
+                                    masses, SPC positions and velocities)
+    settings        dict            integrator and run settings (eg dt, maxT,
+                                    ejectSF, earlyStop)
+
+    ============================================================================
+    output:         type:
+    ============================================================================
+    key             str             32 hex characters
+    """
+    md5 = hashlib.md5()
+    md5.update(str(cacheVersion).encode())
+    for array in arrays:
+        md5.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    md5.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return md5.hexdigest()
+
+def loadResult(key, cacheDir):
+    """
+    use:
+    recorded results of the scenario with this key, or None if it has never
+    been run.
+    """
+    try:
+        with open(os.path.join(cacheDir, key[:2], f"{key}.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def saveResult(key, results, cacheDir):
+    """
+    use:
+    stores the recorded results of a scenario under its key. written to a
+    temporary name first so a concurrent reader never loads half a file.
+    """
+    toDir = os.path.join(cacheDir, key[:2])
+    os.makedirs(toDir, exist_ok=True)
+    tmpFile = os.path.join(toDir, f"{key}.{os.getpid()}.tmp")
+    with open(tmpFile, "w") as f:
+        json.dump({name:(value.item() if isinstance(value, np.generic) else value) for name,value in results.items()}, f)
+    os.replace(tmpFile, os.path.join(toDir, f"{key}.json"))
@@ -0,0 +1,198 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+from pyFiles.Instrumentation import PhaseTimer
+from pyFiles.Simulation import Simulation
+from pyFiles.Telemetry import Telemetry
+
+import pyFiles.Input as inp
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import numpy as np
+import os
+import pandas as pd
+import threading
+
+#===============================================================================#
+# ScenarioPool definition                                                       #
+#===============================================================================#
+
+class ScenarioPool:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, **kwargs):
+        """
+        use:
+        runs single scenarios on request, outside of any campaign: nothing is
+        read from or written to Simulation.sample_ or Simulation.pkl. submit
+        hands a scenario to an asyncio event loop ( on its own thread ) that
+        runs it on a process pool and returns a future right away, so
+        notebooks, the active learning loop, or the prediction server can
+        queue many scenarios and use the results as they complete.
+
+            with ScenarioPool(nJobs=4, earlyStop=True) as pool:
+                futures = [pool.submit(ic) for ic in initialConditions]
+                for future in as_completed(futures): print(future.result())
+
+        inside a coroutine, await asyncio.wrap_future(pool.submit(ic)).
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        kwargs:         type:           description:
+        nJobs           int             worker processes, default = number of
+                                        cpus
+        (any other kwargs are default sim kwargs for every submission, eg
+        earlyStop, ejectSF, megno, memoize, maxSteps; see Simulation.run)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        nJobs = kwargs.pop('nJobs') if 'nJobs' in kwargs else os.cpu_count()
+        self.simKwargs_ = kwargs
+        # numbers the submissions, so each one draws its own random speeds
+        # under an rngSeed
+        self.submissionN_ = itertools.count()
+
+        # column names of a scenario row, and which factors must be given
+        self.colNames_ = _newSimulation().colNames_
+        self.required_ = [colName for colName in self.colNames_['control'] if colName not in inp.constantFactors]
+
+        self.executor_ = ProcessPoolExecutor(max_workers=nJobs, initializer=_submitWorkerInit)
+        self.loop_ = asyncio.new_event_loop()
+        self.thread_ = threading.Thread(target=self.loop_.run_forever, name="ScenarioPool", daemon=True)
+        self.thread_.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, *args):
+        # don't wait on the queue when leaving because of an error
+        self.close(cancel=excType is not None)
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def submit(self, initialConditions, **kwargs):
+        """
+        use:
+        queues one scenario and returns immediately.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        initialConditions dict          factor values by column name ( eg
+                                        'pos_(1,0,0)' ); every control factor
+                                        is required, random factors ( the
+                                        initial speeds 'vel_(i,0,0)' ) are
+                                        drawn if missing ( with an rngSeed,
+                                        from the stream of treatmentN and
+                                        monteCarloN; monteCarloN defaults to
+                                        the submission number ). a pandas
+                                        Series ( eg a row of sample_ ) works
+                                        too.
+
+        kwargs:         type:           description:
+        (sim kwargs for this scenario, on top of the pool's defaults)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        future          Future          concurrent.futures.Future of a dict of
+                                        the recorded scenario row ( factors,
+                                        collide / eject / survive, nSteps,
+                                        final positions and velocities, ... )
+        """
+        initialConditions = dict(initialConditions)
+        missing = [colName for colName in self.required_ if colName not in initialConditions or pd.isna(initialConditions[colName])]
+        if len(missing) > 0:
+            raise KeyError(f"OOPSIE! initial conditions are missing {missing}.\ntry including every control factor: {self.required_}.")
+        if 'monteCarloN' not in initialConditions or pd.isna(initialConditions['monteCarloN']):
+            initialConditions['monteCarloN'] = next(self.submissionN_)
+        simKwargs = {**self.simKwargs_, **kwargs}
+        return asyncio.run_coroutine_threadsafe(self.__run(initialConditions, simKwargs), self.loop_)
+
+    def close(self, **kwargs):
+        """
+        use:
+        stops the loop and the workers. by default every queued scenario is
+        finished first; with cancel=True every unfinished one is cancelled
+        instead ( its future.result() raises CancelledError; a scenario
+        already on a worker still runs out, its result is dropped ).
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        kwargs:         type:           description:
+        cancel          bool            cancel what hasn't finished, default
+                                        = False
+        """
+        cancel = kwargs['cancel'] if 'cancel' in kwargs else False
+        if self.loop_.is_closed(): return
+        asyncio.run_coroutine_threadsafe(self.__drain(cancel), self.loop_).result()
+        self.loop_.call_soon_threadsafe(self.loop_.stop)
+        self.thread_.join()
+        self.executor_.shutdown(wait=True)
+        self.loop_.close()
+
+    #===========================================================================#
+    # semi-private methods                                                      #
+    #===========================================================================#
+
+    async def __drain(self, cancel):
+        # every submitted scenario is a task on this loop, apart from this one
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if cancel:
+            for task in tasks: task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __run(self, initialConditions, simKwargs):
+        return await self.loop_.run_in_executor(self.executor_, _submitWorkerRun, initialConditions, simKwargs)
+
+#===============================================================================#
+# submission workers                                                            #
+#===============================================================================#
+
+# state of a submission worker process, set once by _submitWorkerInit
+_worker = {}
+
+def _newSimulation():
+    # a bare Simulation: column names, a silent timer and telemetry, and no
+    # saved state or sample
+    sim = Simulation.__new__(Simulation)
+    sim.name_ = "Simulation"
+    sim._generateColumnNames()
+    sim.timer_ = PhaseTimer()
+    sim.telemetry_ = Telemetry(0, mode='off')
+    return sim
+
+def _submitWorkerInit():
+    _worker['sim'] = _newSimulation()
+    # forked workers would otherwise all draw the same random speeds
+    np.random.seed()
+
+def _submitWorkerRun(initialConditions, simKwargs):
+    sim = _worker['sim']
+    # a one row sample holding just this scenario
+    row = {colName:np.nan for colName in sim.colNames_['all']}
+    row.update({'treatmentN':0, 'monteCarloN':0, 'nSteps':0, 'collide':0, 'eject':0, 'survive':0})
+    row.update(initialConditions)
+    sim.sample_ = pd.DataFrame([row])
+    sim.sampleRowIdx_ = 0
+    sim._runScenario(**simKwargs)
+    return sim.sample_.to_dict('records')[0]
@@ -4,20 +4,27 @@
 #===============================================================================#
 
 from pyFiles.BaseClass import BaseClass
+from pyFiles.Instrumentation import PhaseTimer
+from pyFiles.Telemetry import Telemetry, WorkerPulse
 
 import pyFiles.Functions as fun
 import pyFiles.Input as inp
+import pyFiles.ScenarioCache as cache
 
 #===============================================================================#
 # import external dependencies                                                  #
 #===============================================================================#
 
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from copy import deepcopy
+import multiprocessing
 import numpy as np
+import os
 import pandas as pd
 import pdb
-from tqdm import tqdm
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from time import perf_counter
 
 #===============================================================================#
 # Simulation definition                                                         #
@@ -71,33 +78,303 @@ class Simulation( BaseClass ):
     # public methods                                                            #
     #===========================================================================#
 
-    def recordScenario( self, valuesDict ):
+    def run( self, **kwargs ):
+        """
+        use:
+        runs every scenario left in sample_ ( see BaseClass.run ), optionally
+        triaging the pending rows with a surrogate first ( see _triage ).
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+
+        kwargs:         type:           description:
+        triage          bool            predict-then-verify, default = False
+        confidence      float           triage: predicted probability at which
+                                        a row counts as confident, default =
+                                        0.99
+        auditRate       float           triage: fraction of the confident rows
+                                        simulated anyway as a spot check,
+                                        default = 0.05
+        surrogateData   str             triage: csv of earlier sim results to
+                                        fit the surrogate on ( with the
+                                        finished rows of sample_ ), default =
+                                        'data/Simulation.csv'
+        nJobs           int             worker processes; above 1 the pending
+                                        rows are run longest-expected-first
+                                        ( see _runParallel ), default = 1
+        maxSteps        int             step budget per scenario; a run that
+                                        hits it without an outcome is marked
+                                        'truncated', default = None
+        maxWallTime     float           wall clock budget ( s ) per scenario,
+                                        same marking, default = None
+        (any other kwargs are passed on to BaseClass.run)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        triage = kwargs.pop( 'triage' ) if 'triage' in kwargs else False
+        confidence = kwargs.pop( 'confidence' ) if 'confidence' in kwargs else 0.99
+        auditRate = kwargs.pop( 'auditRate' ) if 'auditRate' in kwargs else 0.05
+        surrogateData = kwargs.pop( 'surrogateData' ) if 'surrogateData' in kwargs else "data/Simulation.csv"
+        nJobs = kwargs.pop( 'nJobs' ) if 'nJobs' in kwargs else 1
+        if triage and not self.runComplete_: self._triage( confidence, auditRate, surrogateData )
+        if nJobs > 1:
+            self._runParallel( nJobs, **kwargs )
+        else:
+            super().run( **kwargs )
+
+    def runActive( self, nRounds, batchSize, **kwargs ):
+        """
+        use:
+        adaptive campaign: alternates between running every pending scenario
+        in sample_ and choosing the next batch of initial conditions where a
+        surrogate fit on the completed rows is least sure of the outcome
+        ( highest entropy of the predicted collide / eject / survive
+        probabilities ). new rows are appended to sample_ with the round that
+        chose them in 'acquisitionRound' ( 0 for the original DOE ) and their
+        predicted entropy in 'uncertainty'.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        nRounds         int             number of batches to choose and run
+        batchSize       int             scenarios per batch
+
+        kwargs:         type:           description:
+        nCandidates     int             random control factor points scored per
+                                        round, default = 100 * batchSize
+        seed            int             default = 0
+        (any other kwargs are passed on to run)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        nCandidates = kwargs.pop( 'nCandidates' ) if 'nCandidates' in kwargs else 100 * batchSize
+        seed = kwargs.pop( 'seed' ) if 'seed' in kwargs else 0
+
+        if 'acquisitionRound' not in self.sample_: self.sample_[ 'acquisitionRound' ] = 0
+        if 'uncertainty' not in self.sample_: self.sample_[ 'uncertainty' ] = np.nan
+        firstRound = int( self.sample_[ 'acquisitionRound' ].max() ) + 1
+
+        for acquisitionRound in range( firstRound, firstRound + nRounds ):
+            # finish whatever is pending before fitting
+            if not self.runComplete_: self.run( **kwargs )
+            candidates, entropy = self._proposeScenarios( nCandidates, seed=seed + acquisitionRound )
+            best = np.argsort( entropy, kind='stable' )[ ::-1 ][ :batchSize ]
+            self._appendScenarios( candidates[ best ], acquisitionRound=acquisitionRound, uncertainty=entropy[ best ] )
+            fun.printHeader( f"active learning round {acquisitionRound}: added {best.size} scenarios, mean uncertainty {entropy[ best ].mean():0.3f}", verbose=True )
+        self.run( **kwargs )
+
+    def runSequential( self, **kwargs ):
+        """
+        use:
+        sequential Monte Carlo campaign. every treatment starts with
+        minReplicates of its pending replicates; the rest go into a shared
+        reserve ( replicateBudget_ ). after each round the Wilson interval on
+        each treatment's outcome rates is checked, and treatments whose
+        interval is still wider than halfWidth get batchSize more replicates
+        ( widest first ) until none are left uncertain or the budget is spent.
+        replicates a treatment doesn't need are freed for the uncertain ones,
+        which may run more than their nominal number ( up to maxReplicates ).
+        new rows get 'replicateRound'; extra replicates reuse the treatment's
+        control factors with new random factors.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+
+        kwargs:         type:           description:
+        halfWidth       float           target half width of the interval,
+                                        default = 0.15
+        outcomes        list            outcome rates the target applies to,
+                                        default = [ 'survive' ] ( use
+                                        colNames_['estimators'] for all three )
+        minReplicates   int             replicates per treatment in the first
+                                        round, default = 4
+        batchSize       int             replicates added per uncertain
+                                        treatment per round, default = 2
+        maxReplicates   int             most replicates of one treatment,
+                                        default = 4 * nominal replicates
+        z               float           standard normal quantile, default =
+                                        1.96
+        (any other kwargs are passed on to run)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        halfWidth = kwargs.pop( 'halfWidth' ) if 'halfWidth' in kwargs else 0.15
+        outcomes = kwargs.pop( 'outcomes' ) if 'outcomes' in kwargs else [ 'survive' ]
+        minReplicates = kwargs.pop( 'minReplicates' ) if 'minReplicates' in kwargs else 4
+        batchSize = kwargs.pop( 'batchSize' ) if 'batchSize' in kwargs else 2
+        z = kwargs.pop( 'z' ) if 'z' in kwargs else 1.96
+        nominal = int( self.sample_.groupby( 'treatmentN' ).size().max() )
+        maxReplicates = kwargs.pop( 'maxReplicates' ) if 'maxReplicates' in kwargs else 4 * nominal
+
+        # hold back all but the first minReplicates pending replicates of each
+        # treatment ( only once, so an interrupted campaign resumes )
+        if 'replicateRound' not in self.sample_:
+            self.sample_[ 'replicateRound' ] = 0
+            rank = self.sample_.groupby( 'treatmentN' ).cumcount()
+            held = self.sample_.index[ ( self.sample_.index >= self.sampleRowIdx_ ) & ( rank >= minReplicates ) ]
+            self.replicateReserve_ = self.sample_.loc[ held ]
+            self.replicateBudget_ = held.size
+            self.sample_ = self.sample_.drop( index=held ).reset_index( drop=True )
+            self.runComplete_ = self.sampleRowIdx_ == self.sample_.shape[0]
+
+        replicateRound = int( self.sample_[ 'replicateRound' ].max() )
+        while True:
+            if not self.runComplete_: self.run( **kwargs )
+
+            # interval on the outcome rates of every treatment
+            done = self._simulatedRows( self.sample_ ).groupby( 'treatmentN' )
+            nReplicates = done.size()
+            widths = fun.wilsonHalfWidth( done[ outcomes ].sum().to_numpy(), nReplicates.to_numpy()[ :, None ], z=z ).max( axis=1 )
+            uncertain = ( widths > halfWidth ) & ( nReplicates.to_numpy() < maxReplicates )
+            fun.printHeader( f"sequential Monte Carlo round {replicateRound}: {uncertain.sum()} of {uncertain.size} treatments above half width {halfWidth}, {self.replicateBudget_} replicates left", verbose=True )
+            if not uncertain.any() or self.replicateBudget_ <= 0: break
+
+            # widest intervals first, as far as the budget goes
+            order = np.argsort( -widths[ uncertain ], kind='stable' )
+            treatments = nReplicates.index.to_numpy()[ uncertain ][ order ]
+            room = np.minimum( batchSize, maxReplicates - nReplicates.to_numpy()[ uncertain ][ order ] )
+            room = np.minimum( room, np.maximum( self.replicateBudget_ - np.concatenate( [ [0], np.cumsum( room )[ :-1 ] ] ), 0 ) )
+            replicateRound += 1
+            new = [ self._replicateRows( treatmentN, nRows ) for treatmentN, nRows in zip( treatments, room ) if nRows > 0 ]
+            new = pd.concat( new, ignore_index=True )
+            new[ 'replicateRound' ] = replicateRound
+            self.replicateBudget_ -= new.shape[0]
+            self.sample_ = pd.concat( [ self.sample_, new ], ignore_index=True )
+            self.runComplete_ = False
+
+    def runMultiFidelity( self, **kwargs ):
+        """
+        use:
+        two stage campaign. every pending scenario first runs with a coarse
+        time step ( coarseScale * dt0 ) while tracking how close it came to
+        the outcome criteria. only the ambiguous ones are then re-run from the
+        same initial conditions ( speeds included ) at full resolution, as new
+        rows. a scenario is ambiguous if
+            - it didn't eject, but its largest speed / escape speed came
+              within escapeBand of ejectSF,
+            - it didn't collide, but its smallest separation / radius sum
+              came within separationBand of 1, or
+            - its relative energy drift is above driftTol.
+        ( with earlyStop a run stops on the step that crosses a criterion, so
+        the margin of the outcome it reached is always inside the band. )
+        every row gets 'fidelity' ( 'coarse' or 'fine' ), 'dtScale',
+        'minSeparationRatio', 'maxEscapeRatio', and 'energyDrift'; coarse rows
+        that were re-run get 'refined' = 1.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+
+        kwargs:         type:           description:
+        coarseScale     float           time step scale of the coarse pass,
+                                        default = 8
+        escapeBand      float           relative band around ejectSF, default
+                                        = 0.1
+        separationBand  float           relative band around 1, default = 0.5
+        driftTol        float           relative energy drift, default = 1e-3
+        (any other kwargs are passed on to run)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        coarseScale = kwargs.pop( 'coarseScale' ) if 'coarseScale' in kwargs else 8
+        escapeBand = kwargs.pop( 'escapeBand' ) if 'escapeBand' in kwargs else 0.1
+        separationBand = kwargs.pop( 'separationBand' ) if 'separationBand' in kwargs else 0.5
+        driftTol = kwargs.pop( 'driftTol' ) if 'driftTol' in kwargs else 1e-3
+        ejectSF = kwargs['ejectSF'] if 'ejectSF' in kwargs else 1
+
+        # coarse pass over every pending row
+        for colName, value in [ ( 'fidelity', None ), ( 'dtScale', np.nan ), ( 'refined', 0 ) ]:
+            if colName not in self.sample_: self.sample_[ colName ] = value
+        pending = self.sample_.index >= self.sampleRowIdx_
+        self.sample_.loc[ pending & self.sample_['fidelity'].isna(), [ 'fidelity', 'dtScale' ] ] = [ 'coarse', coarseScale ]
+        if not self.runComplete_: self.run( **kwargs )
+
+        # fine pass over the ambiguous coarse rows
+        coarse = self.sample_[ ( self.sample_['fidelity'] == 'coarse' ) & ( self.sample_['refined'] == 0 ) ]
+        if 'source' in coarse: coarse = coarse[ coarse['source'] != 'predicted' ]
+        ambiguous = (
+            ( ( coarse['eject'] == 0 ) & ( ( coarse['maxEscapeRatio'] / ejectSF - 1 ).abs() < escapeBand ) ) |
+            ( ( coarse['collide'] == 0 ) & ( ( coarse['minSeparationRatio'] - 1 ).abs() < separationBand ) ) |
+            ( coarse['energyDrift'] > driftTol )
+        )
+        fine = coarse[ ambiguous ].copy()
+        fun.printHeader( f"multi-fidelity: {fine.shape[0]} of {coarse.shape[0]} coarse scenarios are ambiguous, re-running them at full resolution", verbose=True )
+        if fine.shape[0] == 0: return
+        self.sample_.loc[ fine.index, 'refined' ] = 1
+        # keep the initial conditions, clear the results
+        inputs = self.colNames_['monteCarlo'] + self.colNames_['constant'] + self.colNames_['control'] + self.colNames_['random']
+        inputs += [ f"{name}_({starIdx},{coordinateIdx},0)" for name in [ 'pos', 'vel' ] for starIdx in range(3) for coordinateIdx in range(3) ]
+        for colName in fine:
+            if colName not in inputs: fine[ colName ] = np.nan
+        for colName in [ 'nSteps', 'collide', 'eject', 'survive', 'refined' ]: fine[ colName ] = 0
+        fine[ 'fidelity' ] = 'fine'
+        fine[ 'dtScale' ] = 1
+        if 'source' in fine: fine[ 'source' ] = 'simulated'
+        self.sample_ = pd.concat( [ self.sample_, fine ], ignore_index=True )
+        self.runComplete_ = False
+        self.run( **kwargs )
+
+    def recordScenario( self, valuesDict, **kwargs ):
         vd = valuesDict
 
+        verbose = kwargs['verbose'] if 'verbose' in kwargs else False
+
         pResults = {
             'collide'   : 'COLLISION!',
             'eject'     : 'EJECTION!',
             'timeLimit' : "I WILL SURVIVE!"
         }
 
-        year = vd[ 'time' ] / inp.yr2s
+        # convert from N-body units back to s, AU, and km/s
+        runTime = vd[ 'time' ] * inp.nbodyT # s
+        spc_i3_t    = vd['kernels']['convert']( vd['x_i3_t'] * inp.nbodyL ) # AU, rad, rad
+        spcdot_i3_t = vd['kernels']['convert']( vd['xdot_i3_t'] * inp.nbodyV ) # km/s, rad, rad
+
+        year = runTime / inp.yr2s
         for key, item in pResults.items():
-            if bool( vd[ key ] ): print( f"{pResults[ key ]} @ year = {year:0.2f}" )
+            if verbose and bool( vd[ key ] ): print( f"{pResults[ key ]} @ year = {year:0.2f}" )
 
         # collect results for ALL columns
         results = {
-            'runTime'   : vd['time'],
+            'runTime'   : runTime,
             'collide'   : int( vd['collide'] ),
             'eject'     : int( vd['eject'] ),
-            'survive'   : int( vd['timeLimit'] ),
+            'survive'   : int( vd['timeLimit'] or vd['regular'] ),
             'nSteps'    : int( vd['steps'] ),
         }
+        # add the chaos indicator, and whether it stopped the run early
+        if vd['megno']:
+            results['megno'] = vd['megnoValue']
+            results['megnoStop'] = int( vd['regular'] )
+        # add the margins to the outcome criteria if tracked
+        if vd['trackMargins']:
+            results['minSeparationRatio'] = vd['minSeparationRatio']
+            results['maxEscapeRatio'] = vd['maxEscapeRatio']
+            results['energyDrift'] = abs( fun.nBodyEnergy( vd['x_i3_t'], vd['xdot_i3_t'], vd['mn_i1'] ) / vd['energy0'] - 1 )
         # add all final posigion and velocities
         for starIdx in range(3):
             for coordinateIdx in range(3):
                 for name, array in zip(
                     [ 'pos'         , 'vel'             ],
-                    [ vd['spc_i3_t'], vd['spcdot_i3_t'] ]
+                    [ spc_i3_t      , spcdot_i3_t       ]
                 ):
                     colName = f"{name}_({starIdx},{coordinateIdx},-1)"
                     results[ colName ] = array[ starIdx, coordinateIdx ]
@@ -107,40 +384,80 @@ class Simulation( BaseClass ):
                 ):
                     colName = f"{name}_({starIdx},{coordinateIdx},0)"
                     results[ colName ] = array[ starIdx, coordinateIdx ]
+        if 'truncated' in vd: results['truncated'] = int( vd['truncated'] )
+        # remember the outcome for identical scenarios ( not runTime, and not
+        # a run cut short by the wall clock )
+        if vd['memoize'] and not ( vd['truncated'] if 'truncated' in vd else False ):
+            cache.saveResult( vd['cacheKey'], { key:value for key, value in results.items() if key != 'runTime' }, vd['cacheDir'] )
+            results['cacheHit'] = 0
         for colName, value in results.items():
             self.sample_.loc[ self.sampleRowIdx_, colName ] = value
 
     def runScenario( self, valuesDict, **kwargs):
         vd = valuesDict
 
+        kernels = vd['kernels']
+
+        # everything in here is in N-body units ( G = 1 ), see Input
+
         # update time, time step, positions, and velocities
-        vd['time'], vd['dt'], vd['x_i3_t'], vd['xdot_i3_t'] = fun.nBodyRungeKutta4( vd['time'], vd['dt'], vd['x_i3_t'], vd['xdot_i3_t'], vd['m_i1'] )
+        if vd['megno']:
+            vd['time'], vd['dt'], vd['x_i3_t'], vd['xdot_i3_t'], vd['dx_i3_t'], vd['dxdot_i3_t'] = kernels['rk4']( vd['time'], vd['dt'], vd['x_i3_t'], vd['xdot_i3_t'], vd['dx_i3_t'], vd['dxdot_i3_t'], vd['mn_i1'] )
+        else:
+            vd['time'], vd['dt'], vd['x_i3_t'], vd['xdot_i3_t'] = kernels['rk4']( vd['time'], vd['dt'], vd['x_i3_t'], vd['xdot_i3_t'], vd['mn_i1'] )
 
         # see if any stars collided
-        vd['collide'] = fun.checkCollision( vd['x_i3_t'], vd['r_i1'] )
+        vd['collide'] = kernels['collision']( vd['x_i3_t'], vd['rn_i1'] )
 
         # see if any stars are moving to fast
-        vd['eject'] = fun.checkEjection( vd['x_i3_t'], vd['xdot_i3_t'], vd['m_i1'], **kwargs)
-
-        # see if timit limit has been exceeded
-        vd['timeLimit'] = ( vd['time'] >= inp.maxT )
+        vd['eject'] = kernels['ejection']( vd['x_i3_t'], vd['xdot_i3_t'], vd['mn_i1'], **kwargs)
+
+        # see if timit limit has been exceeded; counted in whole steps, the
+        # summed time can fall short of maxT by rounding
+        vd['timeLimit'] = ( vd['steps'] + 1 >= vd['nTimeSteps'] )
+
+        # MEGNO: time weighted average of the tangent vector's stretching rate
+        # and its running mean, which settles at 2 for a regular orbit and
+        # grows for a chaotic one. the rate doesn't depend on the tangent
+        # vector's length, so it is renormalized every step
+        if vd['megno']:
+            rate = kernels['megno']( vd['x_i3_t'], vd['dx_i3_t'], vd['dxdot_i3_t'], vd['mn_i1'] )
+            vd['megnoIntegral'] += rate * vd['time'] * vd['dt']
+            vd['megnoMeanIntegral'] += 2 * vd['megnoIntegral'] / vd['time'] * vd['dt']
+            vd['megnoValue'] = vd['megnoMeanIntegral'] / vd['time']
+            norm = np.sqrt( ( vd['dx_i3_t']**2 ).sum() + ( vd['dxdot_i3_t']**2 ).sum() )
+            vd['dx_i3_t'] /= norm
+            vd['dxdot_i3_t'] /= norm
+            # with megnoStop, regular once the mean has stayed below the
+            # threshold and moved less than megnoTol over megnoWindows windows
+            # in a row ( each megnoPeriods orbital periods long )
+            if vd['time'] >= vd['megnoNextCheck']:
+                settled = abs( vd['megnoValue'] - vd['megnoCheck'] ) < vd['megnoTol'] and vd['megnoValue'] < vd['megnoThreshold']
+                vd['megnoSettled'] = vd['megnoSettled'] + 1 if settled else 0
+                vd['regular'] = vd['megnoStop'] and vd['megnoSettled'] >= vd['megnoWindows'] and not ( vd['collide'] or vd['eject'] )
+                vd['megnoCheck'] = vd['megnoValue']
+                vd['megnoNextCheck'] += vd['megnoWindow']
+
+        # closest approaches to the collision and ejection criteria
+        if vd['trackMargins']:
+            vd['minSeparationRatio'] = min( vd['minSeparationRatio'], kernels['separation']( vd['x_i3_t'], vd['rn_i1'] ) )
+            vd['maxEscapeRatio'] = max( vd['maxEscapeRatio'], kernels['escape']( vd['x_i3_t'], vd['xdot_i3_t'], vd['mn_i1'] ) )
 
         # increment step counter
         vd['steps'] += 1
 
-        # convert ending values back to SPC
-        vd['spc_i3_t']    = fun.xyz2spc( vd['x_i3_t'] )
-        vd['spcdot_i3_t'] = fun.xyz2spc( vd['xdot_i3_t'] )
-
         # return the updated values dictionary
         return vd
 
     def setupScenario( self, sampleRowIdx, **kwargs ):
 
+        # timer for the phases of this scenario (disabled unless provided)
+        timer = kwargs['timer'] if 'timer' in kwargs else PhaseTimer()
+
         # scenario number
         n1 = sampleRowIdx + 1
 
-        fun.printHeader( f"scenario:\t{n1} / {self.sample_.shape[0]}", verbose = True )
+        fun.printHeader( f"scenario:\t{n1} / {self.sample_.shape[0]}", **kwargs )
 
         # use the sampleRowIdx to get treatement values
         sampleRow = self.sample_.iloc[ sampleRowIdx ]
@@ -180,12 +497,20 @@ class Simulation( BaseClass ):
         x_i3 -= CM_13 # AU
 
         # calculate escape velocity from system
-        escapeSpeed_i1 = fun.escapeSpeed(x_i3, m_i1) # km/s
+        escapeSpeed_i1 = fun.escapeSpeed( x_i3 / inp.nbodyL, m_i1 / inp.nbodyM ) * inp.nbodyV # km/s
 
         # construct spc initial velocity vectors
         spcdot_i3 = np.zeros((3,3)) # (km/s, radian, radian)
-        # assign random speed
-        spcdot_i3[ : , 0 ] = fun.randomSpeed(escapeSpeed_i1)[:,0] # (km/s, radian, radian)
+        # assign random speed, unless the row already has its speeds ( eg a
+        # re-run of a recorded scenario )
+        speedCols = [ f"vel_({starIdx},0,0)" for starIdx in range(3) ]
+        if all( [ colName in sampleRow and not pd.isna( sampleRow[colName] ) for colName in speedCols ] ):
+            spcdot_i3[ : , 0 ] = sampleRow[ speedCols ].to_numpy( np.float64 ) # km/s
+        else:
+            # with rngSeed every scenario gets its own reproducible stream
+            rngSeed = kwargs['rngSeed'] if 'rngSeed' in kwargs else None
+            rng = np.random if rngSeed is None else np.random.RandomState( [ rngSeed, int( sampleRow['treatmentN'] ), int( sampleRow['monteCarloN'] ) ] )
+            spcdot_i3[ : , 0 ] = fun.randomSpeed( escapeSpeed_i1, rng=rng )[:,0] # (km/s, radian, radian)
         # assign angles
         for starIdx in range(3):
             for coordinateIdx in [1, 2]:
@@ -203,17 +528,86 @@ class Simulation( BaseClass ):
         # find star radii
         r_i1 = fun.stellarRadiiLookup( m_i1 ) # AU
 
+        # the integrator state is kept in N-body units ( G = 1 ); these are
+        # the only conversions until the scenario is recorded
+
         # set starting run time and step counter
-        steps, time = 0, 0 # int, s
+        steps, time = 0, 0.0 # int, T
 
         # initialize time and positions to be updated
-        x_i3_t    = deepcopy( x_i3 ) # AU
-        xdot_i3_t = deepcopy( xdot_i3 ) # km/s
+        x_i3_t    = x_i3 / inp.nbodyL # L
+        xdot_i3_t = xdot_i3 / inp.nbodyV # V
+
+        # masses and radii
+        mn_i1 = m_i1 / inp.nbodyM # M
+        rn_i1 = r_i1 / inp.nbodyL # L
 
         # initialize time step using smallest quotent of distance & initial
         # speed
-        # dt = fun.timeStep( x_i3, xdot_i3, initial=True, scale=inp.dt0ScaleFactor )
-        dt = inp.dt0
+        # dt = fun.timeStep( x_i3_t, xdot_i3_t, initial=True, scale=inp.dt0ScaleFactor )
+        # multi-fidelity rows can scale it ( see runMultiFidelity )
+        dtScale = sampleRow['dtScale'] if 'dtScale' in sampleRow and not pd.isna( sampleRow['dtScale'] ) else 1
+        dt = dtScale * inp.dt0 / inp.nbodyT # T
+
+        # margins to the outcome criteria, only tracked for multi-fidelity
+        # rows; energy drift is measured against the starting energy
+        trackMargins = 'fidelity' in sampleRow and not pd.isna( sampleRow['fidelity'] )
+        minSeparationRatio, maxEscapeRatio = np.inf, 0.0
+        energy0 = fun.nBodyEnergy( x_i3_t, xdot_i3_t, mn_i1 ) if trackMargins else np.nan
+
+        # time limit, and the number of steps it takes to reach it
+        maxT = inp.maxT / inp.nbodyT # T
+        nTimeSteps = int( round( maxT / dt ) )
+
+        # optional chaos indicator ( MEGNO ), see runScenario; with megnoStop
+        # a survivor is classified as regular and stopped once it has
+        # converged. the window is measured in orbital periods of the system,
+        # a shorter one can't tell a regular orbit from a slow ejection
+        megnoStop = kwargs['megnoStop'] if 'megnoStop' in kwargs else False
+        megno = ( kwargs['megno'] if 'megno' in kwargs else False ) or megnoStop
+        megnoThreshold = kwargs['megnoThreshold'] if 'megnoThreshold' in kwargs else 2.2
+        megnoTol = kwargs['megnoTol'] if 'megnoTol' in kwargs else 0.1
+        megnoPeriods = kwargs['megnoPeriods'] if 'megnoPeriods' in kwargs else 1
+        megnoWindows = kwargs['megnoWindows'] if 'megnoWindows' in kwargs else 3
+        megnoWindow = megnoPeriods * fun.orbitalPeriod( x_i3_t, mn_i1 ) # T
+        megnoIntegral, megnoMeanIntegral, megnoValue, megnoCheck, megnoNextCheck, megnoSettled = 0.0, 0.0, np.nan, np.nan, megnoWindow, 0
+        regular = False
+        if megno:
+            # random unit tangent vector, reproducible per scenario
+            delta_6N = np.random.RandomState( sampleRowIdx ).normal( size=18 )
+            delta_6N /= np.sqrt( ( delta_6N**2 ).sum() )
+            dx_i3_t, dxdot_i3_t = delta_6N[ :9 ].reshape( 3, 3 ), delta_6N[ 9: ].reshape( 3, 3 )
+
+        # kernels used by runScenario; only wrapped if the timer is enabled
+        kernels = {
+            'rk4'       : timer.wrap( 'rk4', fun.nBodyVariationalRungeKutta4 if megno else fun.nBodyRungeKutta4 ),
+            'collision' : timer.wrap( 'collision', fun.checkCollision ),
+            'ejection'  : timer.wrap( 'ejection', fun.checkEjection ),
+            'convert'   : timer.wrap( 'convert', fun.xyz2spc ),
+            'separation': timer.wrap( 'separation', fun.separationRatio ),
+            'escape'    : timer.wrap( 'escape', fun.escapeRatio ),
+            'megno'     : timer.wrap( 'megno', fun.megnoRate ),
+        }
+
+        # content-addressed result cache: the resolved initial conditions
+        # ( random draws included ) plus everything else that changes the
+        # outcome. a hit is recorded without integrating ( see _runScenario )
+        memoize = kwargs['memoize'] if 'memoize' in kwargs else False
+        cacheDir = kwargs['cacheDir'] if 'cacheDir' in kwargs else "data/cache/scenarios"
+        cacheKey, cached = None, None
+        if memoize:
+            settings = {
+                'integrator'    : 'rk4',
+                'dt'            : dt,
+                'maxT'          : maxT,
+                'ejectSF'       : kwargs['ejectSF'] if 'ejectSF' in kwargs else 1,
+                'earlyStop'     : kwargs['earlyStop'] if 'earlyStop' in kwargs else False,
+                'trackMargins'  : trackMargins,
+                'megno'         : [ megno, megnoThreshold, megnoTol, megnoPeriods, megnoWindows ] if megnoStop else megno,
+                'maxSteps'      : kwargs['maxSteps'] if 'maxSteps' in kwargs else None,
+            }
+            cacheKey = cache.scenarioKey( [ m_i1, r_i1, spc_i3, spcdot_i3 ], settings )
+            cached = cache.loadResult( cacheKey, cacheDir )
 
         # return all the locally defined variables as dictionary
         return locals()
@@ -231,32 +625,311 @@ class Simulation( BaseClass ):
 
         earlyStop = kwargs['earlyStop'] if 'earlyStop' in kwargs else False
 
+        # triaged rows with a confident prediction aren't simulated
+        if 'source' in self.sample_ and self.sample_.loc[ self.sampleRowIdx_, 'source' ] == 'predicted': return
+
         # set terminition conditions
         collide   = False
         eject     = False
         timeLimit = False
 
-        valuesDict = self.setupScenario( self.sampleRowIdx_ )
-        dt   = valuesDict['dt']
-        maxT = inp.maxT
-        N = int(maxT/dt)
-        pbar = tqdm(total=N)
+        # per-scenario timer, merged into the run-level timer once recorded
+        timer = PhaseTimer( enabled=self.timer_.enabled_ )
+        setupScenario  = timer.wrap( 'setup', self.setupScenario )
+        recordScenario = timer.wrap( 'record', self.recordScenario )
+
+        setupKwargs = { key:kwargs[key] for key in [ 'megno', 'megnoStop', 'megnoThreshold', 'megnoTol', 'megnoPeriods', 'megnoWindows', 'memoize', 'cacheDir', 'rngSeed', 'ejectSF', 'earlyStop', 'maxSteps' ] if key in kwargs }
+        valuesDict = setupScenario( self.sampleRowIdx_, timer=timer, **setupKwargs )
+
+        # identical scenario already run: record its results instead
+        if valuesDict['cached'] is not None:
+            for colName, value in valuesDict['cached'].items():
+                if colName == 'runTime': continue
+                self.sample_.loc[ self.sampleRowIdx_, colName ] = value
+            # nothing was integrated for this row
+            self.sample_.loc[ self.sampleRowIdx_, 'runTime' ] = 0
+            self.sample_.loc[ self.sampleRowIdx_, 'cacheHit' ] = 1
+            outcome = next( ( key for key in [ 'collide', 'eject', 'survive' ] if valuesDict['cached'][ key ] ), None )
+            self.telemetry_.update( steps=0, outcome=outcome )
+            if timer.enabled_: self.timer_.merge( timer )
+            return
+        N = valuesDict['nTimeSteps']
+        # optional per-scenario budgets; the wall clock is only read every
+        # stride steps
+        maxSteps = kwargs['maxSteps'] if 'maxSteps' in kwargs else None
+        maxWallTime = kwargs['maxWallTime'] if 'maxWallTime' in kwargs else None
+        if maxSteps is not None: N = min( N, maxSteps )
+        start = perf_counter()
+        # only check in with telemetry every few steps, it reports on a timer
+        stride = inp.telemetryStride
+        pulse = timer.wrap( 'progress', self.telemetry_.pulse )
         # while not timeLimit:
-        for _ in range(N):
+        for step in range(N):
             valuesDict  = self.runScenario( valuesDict, **kwargs)
             collision   = valuesDict['collide']
             ejection    = valuesDict['eject']
             timeLimit   = valuesDict['timeLimit']
-            pbar.update(1)
+            if step % stride == 0: pulse( step )
             if earlyStop and any([ collision, ejection, timeLimit ]): break
-        pbar.close()
-        self.recordScenario( valuesDict )
+            # converged chaos indicator: regular orbit, counts as survive
+            if valuesDict['regular']: break
+            if maxWallTime is not None and step % stride == 0 and perf_counter() - start > maxWallTime: break
+        # a budget ran out before the scenario reached an outcome
+        if maxSteps is not None or maxWallTime is not None:
+            valuesDict['truncated'] = not any([ valuesDict['collide'], valuesDict['eject'], valuesDict['timeLimit'], valuesDict['regular'] ])
+        recordScenario( valuesDict )
+        # report finished steps and outcome
+        outcomes = { 'collide':valuesDict['collide'], 'eject':valuesDict['eject'], 'survive':valuesDict['timeLimit'] or valuesDict['regular'] }
+        outcome = next( ( key for key, value in outcomes.items() if value ), None )
+        self.telemetry_.update( steps=valuesDict['steps'], outcome=outcome )
+        if timer.enabled_:
+            # phase timing and force evaluation counts, taken once
+            # recordScenario has returned so the record phase is included
+            for colName, value in timer.columns().items():
+                self.sample_.loc[ self.sampleRowIdx_, colName ] = value
+            self.sample_.loc[ self.sampleRowIdx_, 'nForceEvals' ] = inp.rk4ForceEvals * timer.calls_['rk4']
+            timer.add( 'forceEval', 0.0, inp.rk4ForceEvals * timer.calls_['rk4'] )
+            self.timer_.merge( timer )
 
     #===========================================================================#
     # semi-protected methods                                                    #
     # required for BaseClass, implemented here                                  #
     #===========================================================================#
 
+    def _expectedCost( self, pending, costData ):
+        """
+        use:
+        expected number of steps of each pending row, from a random forest
+        regression of log( nSteps ) on the control factors of finished runs
+        ( the simulated, untruncated rows of sample_ and of costData ).
+        without enough history every row gets the full maxT / dt0.
+        """
+        fullSteps = float( inp.maxT / inp.dt0 )
+        data = [ self.sample_.iloc[ :self.sampleRowIdx_ ] ]
+        if costData is not None and os.path.isfile( costData ): data.append( pd.read_csv( costData ) )
+        data = self._simulatedRows( pd.concat( data, ignore_index=True ) )
+        data = data.dropna( subset=self.colNames_['control'] + [ 'nSteps' ] )
+        data = data[ data[ 'nSteps' ] > 0 ]
+        if data.shape[0] < 10: return np.full( pending.shape[0], fullSteps )
+        model = RandomForestRegressor( n_estimators=50, min_samples_leaf=2, n_jobs=-1, random_state=0 )
+        model.fit( data[ self.colNames_['control'] ].to_numpy( np.float64 ), np.log( data[ 'nSteps' ].to_numpy( np.float64 ) ) )
+        return np.exp( model.predict( pending[ self.colNames_['control'] ].to_numpy( np.float64 ) ) )
+
+    def _runParallel( self, nJobs, **kwargs ):
+        """
+        use:
+        runs every scenario left in sample_ on nJobs worker processes. the
+        pending rows are dispatched longest-expected-first ( see
+        _expectedCost ), so the slow survivors start early instead of making
+        up the tail of the run; the prediction is kept in 'expectedSteps'.
+        rows are recorded and state is saved as they finish, in any order
+        ( finishedRows_ lets an interrupted run resume ). the workers write
+        the steps of their running scenarios to a shared array, so telemetry
+        counts them before they finish. phase timing is only collected by the
+        serial run.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        nJobs           int             number of worker processes
+
+        kwargs:         type:           description:
+        costData        str             csv of earlier sim results to learn the
+                                        cost from, default =
+                                        'data/Simulation.csv'
+        telemetry       str             see BaseClass.run
+        telemetryInterval float         see BaseClass.run
+        (any other kwargs are passed on to _runScenario)
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+        costData = kwargs.pop( 'costData' ) if 'costData' in kwargs else "data/Simulation.csv"
+        telemetry = kwargs.pop( 'telemetry' ) if 'telemetry' in kwargs else 'bar'
+        telemetryInterval = kwargs.pop( 'telemetryInterval' ) if 'telemetryInterval' in kwargs else 1.0
+        if 'instrument' in kwargs: kwargs.pop( 'instrument' )
+
+        if not hasattr( self, 'finishedRows_' ): self.finishedRows_ = set()
+        # triaged rows with a confident prediction are already done
+        if 'source' in self.sample_:
+            predicted = self.sample_.index[ ( self.sample_.index >= self.sampleRowIdx_ ) & ( self.sample_[ 'source' ] == 'predicted' ) ]
+            self.finishedRows_.update( predicted.tolist() )
+            self.__advanceRowIdx()
+        pendingIdx = [ rowIdx for rowIdx in range( self.sampleRowIdx_, self.sample_.shape[0] ) if rowIdx not in self.finishedRows_ ]
+        expected = self._expectedCost( self.sample_.loc[ pendingIdx ], costData )
+        self.sample_.loc[ pendingIdx, 'expectedSteps' ] = expected
+        order = [ pendingIdx[ idx ] for idx in np.argsort( -expected, kind='stable' ) ]
+
+        self.timer_ = PhaseTimer()
+        self.telemetry_ = Telemetry( len( order ), mode=telemetry, interval=telemetryInterval, name=self.name_ )
+        state = { key:value for key, value in self.__dict__.items() if key not in self.transientAttributes }
+        # steps of the scenario each worker is running, one slot per worker
+        inFlight = multiprocessing.RawArray( 'q', nJobs )
+        nSlots = multiprocessing.Value( 'i', 0 )
+        with ProcessPoolExecutor( max_workers=nJobs, initializer=_scenarioWorkerInit, initargs=( state, kwargs, inFlight, nSlots ) ) as pool:
+            pending = { pool.submit( _scenarioWorkerRun, rowIdx ) for rowIdx in order }
+            while len( pending ) > 0:
+                done, pending = wait( pending, timeout=telemetryInterval, return_when=FIRST_COMPLETED )
+                for future in done:
+                    rowIdx, row, worker = future.result()
+                    for colName, value in row.items():
+                        self.sample_.loc[ rowIdx, colName ] = value
+                    self.finishedRows_.add( rowIdx )
+                    self.__advanceRowIdx()
+                    self.saveState()
+                    outcome = next( ( key for key in [ 'collide', 'eject', 'survive' ] if row[ key ] ), None )
+                    self.telemetry_.update( scenarios=1, steps=int( row[ 'nSteps' ] ), outcome=outcome, worker=worker )
+                self.telemetry_.collect( inFlight )
+        self.telemetry_.close()
+        fun.printHeader( f"finished {self.name_} scenarios!", verbose=True )
+        self.sample_.to_csv( f"data/{self.name_}.csv", index=False )
+
+    def _appendScenarios( self, controls, **kwargs ):
+        """
+        use:
+        appends new scenarios ( rows of control factor values, in
+        colNames_['control'] order ) to sample_ as pending runs. any kwargs
+        are extra columns ( scalar or one value per row ).
+        """
+        new = pd.DataFrame( np.nan, index=range( controls.shape[0] ), columns=self.sample_.columns )
+        new[ self.colNames_['control'] ] = controls
+        new[ 'treatmentN' ] = int( self.sample_[ 'treatmentN' ].max() ) + 1 + np.arange( controls.shape[0] )
+        new[ 'monteCarloN' ] = 1
+        for colName in [ 'nSteps', 'collide', 'eject', 'survive' ]: new[ colName ] = 0
+        # bookkeeping columns other campaign modes may have added
+        bookkeeping = { 'source':'simulated', 'audit':0, 'refined':0, 'replicateRound':0, 'truncated':0 }
+        for colName, value in bookkeeping.items():
+            if colName in new: new[ colName ] = value
+        for colName, value in kwargs.items(): new[ colName ] = value
+        # only the index and outcome columns are integers; everything else
+        # keeps whatever dtype its values give it
+        intCols = self.colNames_['monteCarlo'] + self.colNames_['estimators'] + [ 'nSteps' ]
+        new = new.astype( { colName:self.sample_[ colName ].dtype for colName in intCols } )
+        self.sample_ = pd.concat( [ self.sample_, new ], ignore_index=True )
+        self.runComplete_ = False
+
+    def _proposeScenarios( self, nCandidates, **kwargs ):
+        """
+        use:
+        fits a random forest on the control factors of the completed rows and
+        scores nCandidates uniformly random control factor points. the random
+        factors ( speeds ) are drawn when a scenario is set up, so they aren't
+        known here and the surrogate averages over them.
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        candidates      np.ndarray      (nCandidates, nControl) control factors
+        entropy         np.ndarray      (nCandidates,) entropy of the predicted
+                                        outcome probabilities ( nats )
+        """
+        seed = kwargs['seed'] if 'seed' in kwargs else 0
+        rng = np.random.RandomState( seed )
+
+        control = self.colNames_['control']
+        low = np.array( [ inp.controlFactors[ colName ][0] for colName in control ] )
+        high = np.array( [ inp.controlFactors[ colName ][1] for colName in control ] )
+        candidates = low + rng.random_sample( ( nCandidates, len( control ) ) ) * ( high - low )
+
+        model = self._controlSurrogate( self._simulatedRows( self.sample_.iloc[ :self.sampleRowIdx_ ] ), seed=seed )
+        P = model.predict_proba( candidates )
+        entropy = -np.sum( P * np.log( np.clip( P, 1e-12, 1 ) ), axis=1 )
+        return candidates, entropy
+
+    def _controlSurrogate( self, data, **kwargs ):
+        """
+        use:
+        random forest from the control factors of finished scenarios to their
+        outcome ( index into colNames_['estimators'] ).
+        """
+        seed = kwargs['seed'] if 'seed' in kwargs else 0
+        y = data[ self.colNames_['estimators'] ].to_numpy().argmax( axis=1 )
+        model = RandomForestClassifier( n_estimators=100, min_samples_leaf=2, random_state=seed )
+        model.fit( data[ self.colNames_['control'] ].to_numpy( np.float64 ), y )
+        return model
+
+    def _replicateRows( self, treatmentN, nRows ):
+        """
+        use:
+        nRows pending replicates of a treatment: held back ones first ( see
+        runSequential ), then new ones that copy its control factors and draw
+        their random factors when run.
+        """
+        reserve = self.replicateReserve_
+        taken = reserve[ reserve[ 'treatmentN' ] == treatmentN ].iloc[ :nRows ]
+        self.replicateReserve_ = reserve.drop( index=taken.index )
+        rows = [ taken ]
+        nNew = nRows - taken.shape[0]
+        if nNew > 0:
+            template = self.sample_[ self.sample_[ 'treatmentN' ] == treatmentN ].iloc[ [0] * nNew ].copy()
+            keep = self.colNames_['monteCarlo'] + self.colNames_['constant'] + self.colNames_['control']
+            for colName in template:
+                if colName not in keep: template[ colName ] = np.nan
+            for colName in [ 'nSteps', 'collide', 'eject', 'survive' ]: template[ colName ] = 0
+            # the treatment's reserve is used up here, so number after all of it
+            lastN = max( self.sample_.loc[ self.sample_[ 'treatmentN' ] == treatmentN, 'monteCarloN' ].tolist() + taken[ 'monteCarloN' ].tolist() )
+            template[ 'monteCarloN' ] = lastN + 1 + np.arange( nNew )
+            rows.append( template )
+        return pd.concat( rows, ignore_index=True )
+
+    def _simulatedRows( self, data ):
+        # rows whose outcome came from the surrogate can't teach it anything,
+        # and runs cut short by a budget have no outcome at all
+        if 'source' in data: data = data[ data[ 'source' ] != 'predicted' ]
+        if 'truncated' in data: data = data[ data[ 'truncated' ] != 1 ]
+        return data
+
+    def _triage( self, confidence, auditRate, surrogateData, seed=0 ):
+        """
+        use:
+        predict-then-verify. a surrogate fit on earlier results scores every
+        pending row; the pending rows are reordered so the least certain are
+        simulated first, then a random auditRate of the confident rows ( spot
+        checks ), and finally the rest of the confident rows, which are not
+        simulated at all: their estimator columns hold the predicted outcome.
+        every row gets 'source' ( 'simulated' or 'predicted' ), 'confidence' (
+        largest predicted probability ), and 'audit' ( 1 for spot checks ).
+        """
+        done = self.sample_.iloc[ :self.sampleRowIdx_ ]
+        pending = self.sample_.iloc[ self.sampleRowIdx_: ].copy()
+
+        # fit on earlier campaigns and whatever has been simulated in this one
+        data = [ self._simulatedRows( done ) ]
+        if os.path.isfile( surrogateData ): data.append( self._simulatedRows( pd.read_csv( surrogateData ) ) )
+        data = pd.concat( data, ignore_index=True ).dropna( subset=self.colNames_['control'] )
+        outcomes = data[ self.colNames_['estimators'] ].to_numpy().argmax( axis=1 )
+        if np.unique( outcomes ).size < 2:
+            fun.printHeader( "triage skipped: need finished scenarios with more than one outcome to fit the surrogate", verbose=True )
+            return
+        model = self._controlSurrogate( data, seed=seed )
+
+        P = model.predict_proba( pending[ self.colNames_['control'] ].to_numpy( np.float64 ) )
+        pending[ 'confidence' ] = P.max( axis=1 )
+        label = model.classes_[ P.argmax( axis=1 ) ]
+        isConfident = pending[ 'confidence' ].to_numpy() >= confidence
+        isAudit = isConfident & ( np.random.RandomState( seed ).random_sample( pending.shape[0] ) < auditRate )
+        isPredicted = isConfident & ~isAudit
+        pending[ 'audit' ] = isAudit.astype( int )
+        pending[ 'source' ] = np.where( isPredicted, 'predicted', 'simulated' )
+        for estIdx, colName in enumerate( self.colNames_['estimators'] ):
+            pending.loc[ isPredicted, colName ] = ( label[ isPredicted ] == estIdx ).astype( int )
+
+        # uncertain rows ( least confident first ), spot checks, predictions
+        rank = np.where( isPredicted, 2, np.where( isAudit, 1, 0 ) )
+        order = np.lexsort( ( pending[ 'confidence' ].to_numpy(), rank ) )
+        if 'source' not in done: done = done.assign( source='simulated', audit=0, confidence=np.nan )
+        self.sample_ = pd.concat( [ done, pending.iloc[ order ] ], ignore_index=True )
+        fun.printHeader(
+            f"triage: {pending.shape[0]} pending scenarios",
+            f"simulate ( uncertain ):\t{( ~isConfident ).sum()}",
+            f"simulate ( audit ):\t{isAudit.sum()}",
+            f"predicted, not simulated:\t{isPredicted.sum()}",
+            verbose=True
+        )
+
     def _getSample( self ):
         # load generated sample file
         data = pd.read_csv( inp.sampleFileName )
@@ -286,9 +959,48 @@ class Simulation( BaseClass ):
     # semi-private                                                              #
     #===========================================================================#
 
+    def __advanceRowIdx( self ):
+        # everything before sampleRowIdx_ is done
+        while self.sampleRowIdx_ in self.finishedRows_:
+            self.finishedRows_.remove( self.sampleRowIdx_ )
+            self.sampleRowIdx_ += 1
+        self.runComplete_ = ( self.sampleRowIdx_ == self.sample_.shape[0] )
+
     def __columnAssertion( self, colName ):
         raise AssertionError(f"can't seem to find {colName}! You \
         have to either include it in constant factors, control\
         factors, or random factors. If you want to include\
         any random factors, other than initial speed, you'll have to implement\
         it!")
+
+#===============================================================================#
+# parallel scenario workers                                                     #
+#===============================================================================#
+
+# state of a scenario worker process, set once by _scenarioWorkerInit
+_worker = {}
+
+def _scenarioWorkerInit( state, kwargs, inFlight, nSlots ):
+    # a bare copy of the Simulation, without its timer; its telemetry only
+    # reports the steps of the running scenario to the parent
+    with nSlots.get_lock():
+        _worker['slot'] = nSlots.value
+        nSlots.value += 1
+    sim = Simulation.__new__( Simulation )
+    sim.__dict__.update( state )
+    sim.timer_ = PhaseTimer()
+    sim.telemetry_ = WorkerPulse( inFlight, _worker['slot'] )
+    _worker['sim'] = sim
+    _worker['inFlight'] = inFlight
+    _worker['kwargs'] = kwargs
+    # forked workers would otherwise all draw the same random speeds
+    np.random.seed()
+
+def _scenarioWorkerRun( rowIdx ):
+    sim = _worker['sim']
+    sim.sampleRowIdx_ = rowIdx
+    sim._runScenario( **_worker['kwargs'] )
+    # finished steps are reported with the row
+    _worker['inFlight'][ _worker['slot'] ] = 0
+    return rowIdx, sim.sample_.loc[ rowIdx ].to_dict(), _worker['slot']
+
@@ -0,0 +1,242 @@
+
+#===============================================================================#
+# import internal dependencies                                                  #
+#===============================================================================#
+
+#===============================================================================#
+# import external dependencies                                                  #
+#===============================================================================#
+
+import json
+import sys
+from time import monotonic, strftime
+
+#===============================================================================#
+# Telemetry definition                                                          #
+#===============================================================================#
+
+class Telemetry:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, total, **kwargs):
+        """
+        use:
+        low-overhead progress reporting for a run. counts are pushed in with
+        update (finished scenarios) and pulse (steps of scenarios still in
+        flight), but nothing is written until at least interval seconds have
+        passed since the last report. counts are kept per worker so reports
+        aggregate over every worker feeding the same instance.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        total           int             number of scenarios expected in the run
+
+        kwargs:         type:           description:
+        mode            str             'bar' (single human readable line),
+                                        'json' (one JSON object per line, for
+                                        headless runs), or 'off'. default =
+                                        'bar'
+        interval        float           minimum seconds between reports,
+                                        default = 1.0
+        name            str             label for the reports, default = 'run'
+        stream          file            where reports are written, default =
+                                        sys.stderr for 'bar', sys.stdout for
+                                        'json'
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        None            None
+        """
+
+        self.total_ = total
+        self.mode_ = kwargs['mode'] if 'mode' in kwargs else 'bar'
+        self.interval_ = kwargs['interval'] if 'interval' in kwargs else 1.0
+        self.name_ = kwargs['name'] if 'name' in kwargs else 'run'
+        if 'stream' in kwargs:
+            self.stream_ = kwargs['stream']
+        else:
+            self.stream_ = sys.stdout if self.mode_ == 'json' else sys.stderr
+
+        if self.mode_ not in ['bar', 'json', 'off']:
+            raise KeyError(f"OOPSIE! telemetry mode '{self.mode_}' isn't implemented.\ntry entries like: 'bar', 'json', or 'off'.")
+
+        # finished scenarios, finished steps, and outcomes for each worker
+        self.scenarios_ = {}
+        self.steps_ = {}
+        self.outcomes_ = {}
+        # steps of the scenario each worker is currently running
+        self.inFlight_ = {}
+
+        self.start_ = monotonic()
+        self.last_ = self.start_
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def close(self):
+        """
+        use:
+        writes the final report, regardless of the interval.
+        """
+        self.inFlight_ = {}
+        self.emit(final=True)
+
+    def collect(self, inFlight):
+        """
+        use:
+        takes the steps of the scenarios worker processes are running from a
+        shared array ( one slot per worker, see WorkerPulse ), then reports
+        if the interval has passed.
+        """
+        for worker, steps in enumerate(inFlight): self.inFlight_[worker] = steps
+        if monotonic() - self.last_ >= self.interval_: self.emit()
+
+    def emit(self, final=False):
+        """
+        use:
+        writes a report now.
+        """
+        self.last_ = monotonic()
+        if self.mode_ == 'off': return
+        report = self.report()
+        if self.mode_ == 'json':
+            report['final'] = final
+            self.stream_.write(json.dumps(report) + "\n")
+        else:
+            end = "\n" if final else ""
+            self.stream_.write(f"\r{self.__barLine(report)}{end}")
+        self.stream_.flush()
+
+    def pulse(self, steps, worker=0):
+        """
+        use:
+        cheap heartbeat from inside a scenario. steps is the number of steps
+        the worker has taken in its current scenario so far.
+        """
+        self.inFlight_[worker] = steps
+        if monotonic() - self.last_ >= self.interval_: self.emit()
+
+    def report(self):
+        """
+        use:
+        aggregates the counts from all workers into a single report.
+
+        ========================================================================
+        output:         type:
+        ========================================================================
+        report          dict            name, time, elapsed, scenarios, total,
+                                        steps, scenarioRate, stepRate,
+                                        outcomes, eta, workers
+        """
+        elapsed = max(monotonic() - self.start_, 1e-9)
+        scenarios = sum(self.scenarios_.values())
+        steps = sum(self.steps_.values()) + sum(self.inFlight_.values())
+        outcomes = {}
+        for workerOutcomes in self.outcomes_.values():
+            for key,value in workerOutcomes.items():
+                outcomes[key] = outcomes.get(key, 0) + value
+        scenarioRate = scenarios / elapsed
+        eta = (self.total_ - scenarios) / scenarioRate if scenarioRate > 0 else None
+        workers = set(self.scenarios_) | set(self.steps_) | set(self.inFlight_)
+        return {
+            'name'          : self.name_,
+            'time'          : strftime('%Y-%m-%dT%H:%M:%S'),
+            'elapsed'       : elapsed,
+            'scenarios'     : scenarios,
+            'total'         : self.total_,
+            'steps'         : steps,
+            'scenarioRate'  : scenarioRate,
+            'stepRate'      : steps / elapsed,
+            'outcomes'      : outcomes,
+            'eta'           : eta,
+            'workers'       : max(len(workers), 1),
+        }
+
+    def update(self, scenarios=0, steps=0, outcome=None, worker=0):
+        """
+        use:
+        records finished work for a worker. a finished scenario should report
+        its total steps here, which also clears the worker's in-flight steps.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        scenarios       int             number of scenarios finished, default
+                                        = 0
+        steps           int             number of steps finished, default = 0
+        outcome         str             outcome of the finished scenario (eg
+                                        'collide'), default = None
+        worker          hashable        id of the worker reporting, default = 0
+        """
+        self.scenarios_[worker] = self.scenarios_.get(worker, 0) + scenarios
+        if steps > 0:
+            self.steps_[worker] = self.steps_.get(worker, 0) + steps
+            self.inFlight_[worker] = 0
+        if outcome is not None:
+            outcomes = self.outcomes_.setdefault(worker, {})
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        if monotonic() - self.last_ >= self.interval_: self.emit()
+
+    #===========================================================================#
+    # semi-private methods                                                      #
+    #===========================================================================#
+
+    def __barLine(self, report, width=20):
+        fraction = report['scenarios'] / max(report['total'], 1)
+        filled = int(round(fraction * width))
+        bar = "#" * filled + "-" * (width - filled)
+        outcomes = " ".join([f"{key} {value}" for key,value in sorted(report['outcomes'].items())])
+        eta = self.__clock(report['eta']) if report['eta'] is not None else "--:--:--"
+        return f"{report['name']} |{bar}| {report['scenarios']}/{report['total']} | {report['scenarioRate']:0.2f} scen/s | {report['stepRate']:0.0f} steps/s | {outcomes} | workers {report['workers']} | elapsed {self.__clock(report['elapsed'])} ETA {eta}"
+
+    def __clock(self, seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+#===============================================================================#
+# WorkerPulse definition                                                        #
+#===============================================================================#
+
+class WorkerPulse:
+
+    #===========================================================================#
+    # constructor                                                               #
+    #===========================================================================#
+
+    def __init__(self, inFlight, slot):
+        """
+        use:
+        stands in for Telemetry inside a worker process. pulse writes the
+        steps of the worker's current scenario into its slot of a shared
+        array, which the parent reads with Telemetry.collect; finished
+        scenarios are recorded by the parent, so update does nothing.
+
+        ========================================================================
+        input:          type:           description:
+        ========================================================================
+        args:           type:           description:
+        inFlight        array           shared array, one slot per worker (eg
+                                        multiprocessing.RawArray)
+        slot            int             this worker's slot
+        """
+        self.inFlight_ = inFlight
+        self.slot_ = slot
+
+    #===========================================================================#
+    # public methods                                                            #
+    #===========================================================================#
+
+    def pulse(self, steps, worker=0):
+        self.inFlight_[self.slot_] = steps
+
+    def update(self, *args, **kwargs):
+        pass